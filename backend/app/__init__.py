@@ -1,4 +1,6 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.youtube_routes import youtube_router
@@ -9,12 +11,78 @@ from app.routes.rating_routes import rating_router
 from app.routes.cookies_routes import cookies_router
 from app.routes.twitter_routes import twitter_router
 from app.routes.facebook_routes import facebook_router
+from app.routes.job_routes import jobs_router
+from app.routes.stream_routes import stream_router
+from app.routes.media_routes import media_router
+from app.routes.thumbnail_routes import thumbnail_router
+from app.routes.batch_routes import batch_router
+from app.utils.executor import executor_stats, shutdown_executor
+from app.utils.download_cache import cache_stats
+from app.utils.single_flight import single_flight_stats
+from app.utils.metadata_cache import metadata_cache_stats
+from app.utils.thumbnail_cache import thumbnail_cache_stats
+from app.utils.disk_quota import run_reaper, disk_usage_stats
+from app.utils.file_serving import file_serving_stats
+from app.utils.http_client import get_http_client, close_http_client
+from app.services.rating_service import rebuild_rating_aggregates
+from app.database import ensure_indexes, database_configured, get_client, close_client, database_stats, mark_unavailable
+from app.utils.write_buffer import run_write_buffers, flush_write_buffers, write_buffer_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranca y libera los recursos compartidos de la aplicación.
+    """
+    # Cliente HTTP compartido (también lo usan los hilos de descarga para las miniaturas)
+    get_http_client()
+    # Borra descargas abandonadas y mantiene la carpeta de descargas dentro de su cuota
+    reaper = asyncio.create_task(run_reaper())
+    # Cliente de MongoDB de este worker; sin MONGO_URI solo fallan las rutas de valoraciones y cookies
+    database_setup = None
+    if database_configured():
+        get_client()
+        # Crea los índices y los agregados de valoraciones si aún no existen (sin bloquear el arranque)
+        database_setup = asyncio.create_task(_prepare_database())
+    else:
+        print("MONGO_URI not set: ratings and cookie logging are disabled")
+    # Escribe en lotes las valoraciones y los consentimientos de cookies pendientes
+    write_buffers = asyncio.create_task(run_write_buffers())
+    yield
+    if database_setup:
+        database_setup.cancel()
+    write_buffers.cancel()
+    # Espera a que el lote cancelado vuelva a la cola antes del último volcado
+    with suppress(asyncio.CancelledError):
+        await write_buffers
+    await flush_write_buffers()
+    close_client()
+    reaper.cancel()
+    await close_http_client()
+    shutdown_executor()
+
+
+async def _prepare_database():
+    removed = 0
+    try:
+        removed = await ensure_indexes()
+    except Exception as e:
+        mark_unavailable(e)
+        print(f"Error creating the database indexes: {str(e)}")
+    # Los agregados se preparan aunque falle la creación de índices
+    try:
+        # Las valoraciones duplicadas borradas estaban contadas en los agregados
+        await rebuild_rating_aggregates(force=removed > 0)
+    except Exception as e:
+        mark_unavailable(e)
+        print(f"Error rebuilding the rating aggregates: {str(e)}")
+
 
 def create_app() -> FastAPI:
     """
     Crea y configura la aplicación FastAPI.
     """
-    app = FastAPI(title="Video Downloader API", version="1.0")
+    app = FastAPI(title="Video Downloader API", version="1.0", lifespan=lifespan)
     
     app.add_middleware(
             CORSMiddleware,
@@ -32,6 +100,11 @@ def create_app() -> FastAPI:
     app.include_router(instagram_router)
     app.include_router(soundcloud_router)
     app.include_router(facebook_router)
+    app.include_router(media_router, tags=["Media"])
+    app.include_router(thumbnail_router, tags=["Thumbnails"])
+    app.include_router(batch_router, tags=["Batch"])
+    app.include_router(jobs_router, tags=["Jobs"])
+    app.include_router(stream_router, tags=["Streaming"])
     app.include_router(twitter_router, prefix="/api", tags=["Twitter"])
     app.include_router(rating_router, prefix="/api", tags=["Ratings"])
     app.include_router(cookies_router, prefix="/api", tags=["Cookies"])
@@ -47,4 +120,23 @@ def create_app() -> FastAPI:
         """
         return {"status": "ok", "message": "Service is up and running"}
 
+    @app.get("/metrics", tags=["Health"])
+    def metrics():
+        """
+        Métricas de la cola de descargas (profundidad de cola y tiempos de espera por plataforma)
+        de las cachés de descargas, metadatos y miniaturas, uso de la carpeta de descargas
+        y escrituras pendientes en la base de datos.
+        """
+        return {
+            "executor": executor_stats(),
+            "single_flight": single_flight_stats(),
+            "download_cache": cache_stats(),
+            "metadata_cache": metadata_cache_stats(),
+            "thumbnail_cache": thumbnail_cache_stats(),
+            "download_folder": disk_usage_stats(),
+            "file_serving": file_serving_stats(),
+            "write_buffers": write_buffer_stats(),
+            "database": database_stats(),
+        }
+
     return app
@@ -1,4 +1,8 @@
 import os
+import time
+import threading
+from pymongo import ASCENDING
+from pymongo.errors import ConnectionFailure
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 
@@ -9,10 +13,152 @@ load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME", "quick_downloader_db")
 
-# Validación mínima (opcional pero recomendable)
-if not MONGO_URI:
-    raise ValueError("MONGO_URI not set in environment variables")
+# Conexiones del pool de cada proceso (cada worker de uvicorn tiene su propio cliente)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+# Milisegundos que una conexión libre se conserva en el pool
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+# Milisegundos esperando un servidor disponible antes de fallar (el driver espera 30 s por defecto)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "3000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+# Segundos sin intentar usar la base de datos después de un fallo de conexión
+MONGO_RETRY_SECONDS = float(os.getenv("MONGO_RETRY_SECONDS", "30"))
 
-# Conexión al cliente y base de datos
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[DB_NAME]
+_client = None
+_lock = threading.Lock()
+_unavailable_until = 0.0
+
+
+class DatabaseUnavailable(RuntimeError):
+    """
+    La base de datos no está configurada o no responde.
+    """
+
+
+def database_configured() -> bool:
+    return bool(MONGO_URI)
+
+
+def is_available() -> bool:
+    """
+    Indica si la base de datos está configurada y no ha fallado recientemente.
+    """
+    return database_configured() and time.monotonic() >= _unavailable_until
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Devuelve el cliente compartido, creándolo la primera vez (en el lifespan de la aplicación).
+    Crear el cliente no abre conexiones: el pool se llena con las primeras consultas, así que
+    importar los módulos o arrancar sin base de datos no cuesta nada.
+
+    :raises DatabaseUnavailable: Si falta MONGO_URI o la base de datos falló hace menos de MONGO_RETRY_SECONDS.
+    """
+    global _client
+    if not database_configured():
+        raise DatabaseUnavailable("MONGO_URI not set in environment variables")
+    if not is_available():
+        raise DatabaseUnavailable("Database unavailable")
+    with _lock:
+        if _client is None:
+            _client = AsyncIOMotorClient(
+                MONGO_URI,
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            )
+        return _client
+
+
+def get_db():
+    """
+    Devuelve la base de datos de la aplicación.
+
+    :raises DatabaseUnavailable: Ver get_client().
+    """
+    return get_client()[DB_NAME]
+
+
+def mark_unavailable(error: Exception):
+    """
+    Tras un fallo de conexión, deja de usar la base de datos durante MONGO_RETRY_SECONDS
+    para que las peticiones no esperen cada una el timeout de selección de servidor.
+    """
+    global _unavailable_until
+    if isinstance(error, ConnectionFailure):
+        _unavailable_until = time.monotonic() + MONGO_RETRY_SECONDS
+        print(f"Database unavailable, retrying in {MONGO_RETRY_SECONDS:g}s: {str(error)}")
+
+
+def close_client():
+    """
+    Cierra el cliente y su pool de conexiones.
+    """
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def database_stats() -> dict:
+    return {
+        "configured": database_configured(),
+        "connected": _client is not None,
+        "available": is_available(),
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+    }
+
+
+async def _remove_duplicate_ratings(ratings) -> int:
+    """
+    Deja una sola valoración por (user_session, download_type en minúsculas), la más reciente,
+    porque las variantes de mayúsculas guardadas antes de normalizar chocarían en el índice único.
+
+    :return: Número de valoraciones borradas.
+    """
+    pipeline = [
+        {"$sort": {"_id": ASCENDING}},
+        {"$group": {
+            "_id": {"user_session": "$user_session", "download_type": {"$toLower": "$download_type"}},
+            "ids": {"$push": "$_id"},
+            "count": {"$sum": 1},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    duplicates = [
+        document_id
+        for group in await ratings.aggregate(pipeline).to_list(length=None)
+        for document_id in group["ids"][:-1]
+    ]
+    if not duplicates:
+        return 0
+    result = await ratings.delete_many({"_id": {"$in": duplicates}})
+    print(f"Removed {result.deleted_count} duplicate ratings")
+    return result.deleted_count
+
+
+async def ensure_indexes() -> int:
+    """
+    Crea los índices de las consultas frecuentes (idempotente, se ejecuta al arrancar).
+    Los tipos de descarga guardados antes de normalizarlos se deduplican y se pasan a
+    minúsculas primero, para que el índice único (user_session, download_type) pueda crearse.
+
+    :return: Número de valoraciones duplicadas borradas (los agregados deben recalcularse si no es 0).
+    """
+    db = get_db()
+    ratings = db["ratings"]
+    removed = await _remove_duplicate_ratings(ratings)
+    await ratings.update_many(
+        {"download_type": {"$regex": "[A-Z]"}},
+        [{"$set": {"download_type": {"$toLower": "$download_type"}}}],
+    )
+    await ratings.create_index(
+        [("user_session", ASCENDING), ("download_type", ASCENDING)],
+        name="user_session_download_type",
+        unique=True,
+    )
+    await db["cookies"].create_index([("session_id", ASCENDING)], name="session_id", unique=True)
+    return removed
@@ -0,0 +1,55 @@
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.services.engine import default_kind, resolve_quality
+from app.services.batch_service import BATCH_MAX_ITEMS, stream_zip
+from app.utils.file_utils import content_disposition
+from app.utils.url_utils import detect_platform
+
+# Initialize router
+batch_router = APIRouter()
+
+
+# Models for download requests
+class BatchItem(BaseModel):
+    url: str
+    platform: Optional[str] = None
+    kind: Optional[str] = None
+    quality: Optional[str] = None
+
+
+class BatchDownloadRequest(BaseModel):
+    items: List[BatchItem]
+
+
+@batch_router.post("/batch/download")
+async def batch_download(request: BatchDownloadRequest):
+    """
+    Downloads many links, from any supported platforms, and returns them as a ZIP archive.
+    The downloads run in parallel and the archive is streamed while they complete.
+    The platform is detected from the URL when it is not given; kind and quality default
+    to the platform defaults. Links that fail are listed in errors.txt inside the archive.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many URLs. At most {BATCH_MAX_ITEMS} per batch.")
+
+    items = []
+    for item in request.items:
+        platform = (item.platform or detect_platform(item.url) or "").lower()
+        if not platform:
+            raise HTTPException(status_code=400, detail=f"Unsupported URL: {item.url}")
+        try:
+            kind = (item.kind or default_kind(platform)).lower()
+            resolve_quality(platform, kind, item.quality)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{item.url}: {str(e)}")
+        items.append({"platform": platform, "kind": kind, "url": item.url, "quality": item.quality})
+
+    return StreamingResponse(
+        stream_zip(items),
+        media_type="application/zip",
+        headers={"content-disposition": content_disposition("downloads.zip")},
+    )
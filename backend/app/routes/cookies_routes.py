@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Request, HTTPException
-from app.database import db
+from app.database import DatabaseUnavailable
+from app.services.cookie_service import log_cookies
 
 cookies_router = APIRouter()
 
@@ -10,15 +11,11 @@ async def log_user_cookies(request: Request):
     """
     try:
         data = await request.json()
-        cookies_collection = db["cookies"]
 
         # Save or update user's cookie information
-        user_entry = {
-            "session_id": data["session_id"],
-            "terms_accepted": data.get("terms_accepted", False),
-            "timestamp": data.get("timestamp"),
-        }
-        await cookies_collection.update_one({"session_id": data["session_id"]}, {"$set": user_entry}, upsert=True)
+        log_cookies(data["session_id"], data.get("terms_accepted", False), data.get("timestamp"))
         return {"message": "User cookie and terms data logged successfully"}
+    except DatabaseUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Error logging cookies: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error logging cookies: {str(e)}")
@@ -1,8 +1,8 @@
 import os
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.facebook_service import download_facebook_video
+from app.utils.file_serving import serve_download
 from dotenv import load_dotenv
 
 # Initialize router
@@ -24,7 +24,7 @@ async def facebook_download(request: FacebookDownloadRequest):
     """
     try:
         # Use the Facebook service to download the video
-        data = download_facebook_video(request.url)
+        data = await download_facebook_video(request.url)
         return {
             "message": "Video downloaded successfully",
             "file_path": data["file_path"],
@@ -37,10 +37,10 @@ async def facebook_download(request: FacebookDownloadRequest):
 
 
 @facebook_router.get("/facebook/download/file")
-async def serve_facebook_file(file_path: str, background_tasks: BackgroundTasks):
+async def serve_facebook_file(file_path: str):
     """
     Serves a Facebook file for direct download.
-    Deletes the file after the user completes the download.
+    Deletes the file once the user completes the download, unless the download cache keeps it.
     """
     try:
         # Normalize the file path
@@ -50,14 +50,10 @@ async def serve_facebook_file(file_path: str, background_tasks: BackgroundTasks)
         if not os.path.exists(normalized_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Schedule file deletion after the response is completed
-        background_tasks.add_task(os.remove, normalized_path)
-
-        # Serve the file
-        return FileResponse(
-            path=normalized_path,
+        # Serve the file (resumable); it is deleted after a complete transfer
+        return serve_download(
+            normalized_path,
             media_type="video/mp4",
-            filename=os.path.basename(normalized_path),
         )
     except Exception as e:
         print(f"Error in serve_facebook_file route: {str(e)}")
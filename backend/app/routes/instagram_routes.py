@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import FileResponse
 from app.services.instagram_service import download_instagram_video
+from app.utils.file_serving import serve_download
 import os
 from dotenv import load_dotenv
 
@@ -21,7 +22,7 @@ async def instagram_download(request: Request):
         url = data.get("url")
         if not url:
             raise HTTPException(status_code=400, detail="Instagram URL is required.")
-        result = download_instagram_video(url)
+        result = await download_instagram_video(url)
         return {
             "message": result["message"],
             "file_path": result["file_path"],
@@ -33,10 +34,10 @@ async def instagram_download(request: Request):
 
 
 @instagram_router.get("/instagram/download/file")
-async def serve_instagram_file(file_path: str, background_tasks: BackgroundTasks):
+async def serve_instagram_file(file_path: str):
     """
     Serves an Instagram file for direct download.
-    Deletes the video and its associated thumbnail after the user completes the download.
+    Deletes the thumbnail, and the video unless the download cache keeps it, once the user completes the download.
     """
     try:
         # Build the absolute path for the file and associated thumbnail
@@ -47,16 +48,12 @@ async def serve_instagram_file(file_path: str, background_tasks: BackgroundTasks
         if not os.path.exists(absolute_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Schedule deletion of the file and its thumbnail after serving
-        background_tasks.add_task(delete_file, absolute_path)
-        if os.path.exists(thumbnail_path):  # Only schedule if the thumbnail exists
-            background_tasks.add_task(delete_file, thumbnail_path)
-
-        # Serve the file
-        return FileResponse(
-            path=absolute_path,
+        # Serve the file (resumable); it and its thumbnail are deleted after a complete transfer
+        return serve_download(
+            absolute_path,
             media_type="video/mp4",
-            filename=os.path.basename(absolute_path)  # Force the correct filename in the download
+            delete=delete_file,
+            companions=[thumbnail_path] if os.path.exists(thumbnail_path) else [],
         )
     except Exception as e:
         print(f"Error in serve_instagram_file route: {str(e)}")
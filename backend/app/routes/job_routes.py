@@ -0,0 +1,140 @@
+import json
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.services.job_service import (
+    FINAL_STATES,
+    submit_job,
+    submit_playlist_job,
+    get_job,
+    cancel_job,
+    subscribe,
+    unsubscribe,
+)
+
+# Initialize router
+jobs_router = APIRouter()
+
+# Models for job requests
+class JobRequest(BaseModel):
+    platform: str
+    url: str
+    kind: str = "video"
+    quality: Optional[str] = None
+
+
+class PlaylistJobRequest(JobRequest):
+    max_items: Optional[int] = None
+    concurrency: Optional[int] = None
+
+
+@jobs_router.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """
+    Queues a download and returns its job ID immediately.
+    Poll GET /jobs/{job_id} for progress and the final file_path.
+    """
+    try:
+        job = submit_job(request.platform.lower(), request.kind.lower(), request.url, request.quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events",
+    }
+
+
+@jobs_router.post("/jobs/playlist", status_code=202)
+async def create_playlist_job(request: PlaylistJobRequest):
+    """
+    Queues the download of every entry of a playlist, SoundCloud set or channel.
+    Entries download in parallel (up to ``concurrency`` at a time); GET /jobs/{job_id}
+    reports the progress of each, and the event stream sends an "item" event with the
+    file_path of every entry as soon as it is downloaded.
+    """
+    try:
+        job = submit_playlist_job(
+            request.platform.lower(),
+            request.kind.lower(),
+            request.url,
+            request.quality,
+            max_items=request.max_items,
+            concurrency=request.concurrency,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/jobs/{job['job_id']}",
+        "events_url": f"/jobs/{job['job_id']}/events",
+    }
+
+
+@jobs_router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """
+    Reports the state, bytes downloaded, speed and ETA of a download job.
+    """
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@jobs_router.delete("/jobs/{job_id}")
+async def delete_job(job_id: str):
+    """
+    Cancels a queued or running download job.
+    """
+    if not cancel_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found or already finished")
+    return {"message": "Cancellation requested", "job_id": job_id}
+
+
+@jobs_router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request, cancel_on_disconnect: bool = True):
+    """
+    Server-Sent Events stream of a job's progress (bytes, total, speed, ETA, postprocessing phase).
+    Playlist jobs also send an "item" event for every finished entry. The stream ends with a "done" event. If the last listener disconnects before the job
+    finishes, the download is cancelled to free capacity (disable with cancel_on_disconnect=false).
+    """
+    if not get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_stream():
+        queue = subscribe(job_id)
+        finished = False
+        try:
+            while True:
+                try:
+                    job = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    continue
+                if job["job_id"] != job_id:
+                    # Finished entry of a playlist job
+                    yield f"event: item\ndata: {json.dumps(job)}\n\n"
+                    continue
+                finished = job["status"] in FINAL_STATES
+                event = "done" if finished else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+                if finished:
+                    break
+        finally:
+            remaining = unsubscribe(job_id, queue)
+            if not finished and cancel_on_disconnect and remaining == 0:
+                cancel_job(job_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
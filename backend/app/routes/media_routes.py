@@ -0,0 +1,102 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from app.services.engine import DOWNLOAD_FOLDER, PLATFORM_PROFILES, download_media, get_info
+from app.utils.executor import run_blocking
+from app.utils.file_serving import serve_download
+
+# Initialize router
+media_router = APIRouter()
+
+MEDIA_TYPES = {".mp4": "video/mp4", ".mp3": "audio/mpeg", ".m4a": "audio/mp4", ".webm": "video/webm"}
+
+
+# Models for download requests
+class MediaDownloadRequest(BaseModel):
+    url: str
+    kind: str = "video"
+    quality: Optional[str] = None
+
+
+@media_router.get("/media/platforms")
+async def list_platforms():
+    """
+    Lists the supported platforms with their download kinds and qualities.
+    """
+    return {
+        platform: {
+            kind: list(settings.get("qualities") or [])
+            for kind, settings in profile["kinds"].items()
+        }
+        for platform, profile in PLATFORM_PROFILES.items()
+    }
+
+
+@media_router.get("/media/{platform}/info")
+async def media_info(platform: str, url: str):
+    """
+    Returns the title and thumbnail of a media URL.
+    """
+    platform = platform.lower()
+    if platform not in PLATFORM_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unsupported platform: {platform}")
+    return await run_blocking(platform, get_info, platform, url)
+
+
+@media_router.post("/media/{platform}/download")
+async def media_download(platform: str, request: MediaDownloadRequest):
+    """
+    Downloads media from any supported platform.
+    Fetch the result with GET /media/file?file_path=...
+    """
+    try:
+        data = await download_media(platform.lower(), request.kind.lower(), request.url, request.quality)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in media_download route: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "message": data["message"],
+        "file_path": data["file_path"],
+        "thumbnail": data["thumbnail"],
+        "thumbnail_proxy": data["thumbnail_proxy"],
+        "title": data["title"],
+    }
+
+
+@media_router.get("/media/file")
+async def serve_media_file(file_path: str):
+    """
+    Serves a downloaded file.
+    Supports Range requests, so interrupted downloads can be resumed. Deletes its thumbnail,
+    and the file unless the download cache keeps it, once the user completes the download.
+    """
+    normalized_path = os.path.join(DOWNLOAD_FOLDER, os.path.basename(file_path))
+    if not os.path.exists(normalized_path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    base, ext = os.path.splitext(normalized_path)
+    thumbnail_path = f"{base}_thumbnail.jpg"
+
+    return serve_download(
+        normalized_path,
+        media_type=MEDIA_TYPES.get(ext.lower(), "application/octet-stream"),
+        delete=delete_file,
+        companions=[thumbnail_path] if os.path.exists(thumbnail_path) else [],
+    )
+
+
+def delete_file(file_path: str):
+    """
+    Deletes the specified file.
+    """
+    try:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+            print(f"Deleted file: {file_path}")
+    except Exception as e:
+        print(f"Error deleting file {file_path}: {str(e)}")
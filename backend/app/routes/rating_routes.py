@@ -1,6 +1,17 @@
-from fastapi import APIRouter, HTTPException
+import json
+import hashlib
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from app.services.rating_service import add_or_update_rating, get_user_rating, get_average_rating
+from pymongo.errors import PyMongoError
+from app.database import DatabaseUnavailable, mark_unavailable
+from app.services.rating_service import (
+    RATING_CACHE_TTL_SECONDS,
+    add_or_update_rating,
+    get_user_rating,
+    get_average_rating,
+)
+from app.utils.file_utils import is_not_modified
 
 rating_router = APIRouter()
 
@@ -10,6 +21,27 @@ class RatingRequest(BaseModel):
     download_type: str = Field(..., description="Type of download (e.g., 'tiktok', 'soundcloud')")
     rating: float = Field(..., ge=1, le=5, description="Rating value between 1 and 5")
 
+
+def cacheable_json(request: Request, data: dict, cache_control: str) -> Response:
+    """
+    Returns JSON with an ETag derived from its content, or 304 if the client already has it.
+    """
+    etag = f'"{hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()}"'
+    headers = {"etag": etag, "cache-control": cache_control}
+    if is_not_modified(request.headers, etag):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(data, headers=headers)
+
+
+def database_error(error: Exception) -> HTTPException:
+    """
+    Maps a missing or failing database to 503, so clients can tell it from a bad request.
+    """
+    mark_unavailable(error)
+    print(f"Database error in rating routes: {str(error)}")
+    return HTTPException(status_code=503, detail="Ratings are temporarily unavailable")
+
+
 @rating_router.post("/ratings")
 async def rate_download(request: RatingRequest):
     """
@@ -19,22 +51,33 @@ async def rate_download(request: RatingRequest):
         return await add_or_update_rating(request.user_session, request.download_type, request.rating)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except DatabaseUnavailable as e:
+        raise database_error(e)
 
 
 @rating_router.get("/ratings/user")
-async def get_user_rating_endpoint(user_session: str, download_type: str):
+async def get_user_rating_endpoint(user_session: str, download_type: str, request: Request):
     """
     Endpoint to get a user's rating for a specific download type.
+    Private to the user's browser, which revalidates it with its ETag.
     """
-    rating = await get_user_rating(user_session, download_type)
+    try:
+        rating = await get_user_rating(user_session, download_type)
+    except (DatabaseUnavailable, PyMongoError) as e:
+        raise database_error(e)
     if not rating:
         raise HTTPException(status_code=404, detail="No rating found for this user and download type.")
-    return rating
+    return cacheable_json(request, rating, "private, no-cache")
 
 
 @rating_router.get("/ratings/average")
-async def get_average_rating_endpoint(download_type: str):
+async def get_average_rating_endpoint(download_type: str, request: Request):
     """
     Endpoint to get the average rating for a specific download type.
+    Shared caches (browsers, CDNs) may keep it for RATING_CACHE_TTL_SECONDS.
     """
-    return await get_average_rating(download_type)
+    try:
+        average = await get_average_rating(download_type)
+    except (DatabaseUnavailable, PyMongoError) as e:
+        raise database_error(e)
+    return cacheable_json(request, average, f"public, max-age={RATING_CACHE_TTL_SECONDS}")
@@ -1,7 +1,7 @@
 import os
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from app.services.soundcloud_service import download_soundcloud_track
-from fastapi.responses import FileResponse
+from app.utils.file_serving import serve_download
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -24,7 +24,7 @@ async def soundcloud_download(request: SoundCloudDownloadRequest):
     """
     try:
         # Use the SoundCloud service to download the track
-        data = download_soundcloud_track(request.url)
+        data = await download_soundcloud_track(request.url)
         return {
             "message": "Track downloaded successfully",
             "file_path": data["file_path"],
@@ -37,12 +37,11 @@ async def soundcloud_download(request: SoundCloudDownloadRequest):
 
 
 @soundcloud_router.get("/soundcloud/download/file")
-async def serve_soundcloud_file(file_path: str, background_tasks: BackgroundTasks):
+async def serve_soundcloud_file(file_path: str):
     """
     Serves a SoundCloud file for direct download.
-    Deletes the file and its associated thumbnail after the user completes the download.
+    Deletes the thumbnail, and the file unless the download cache keeps it, once the user completes the download.
     :param file_path: Relative path to the file to download.
-    :param background_tasks: BackgroundTasks for handling cleanup.
     """
     try:
         # Normalize the file path
@@ -53,16 +52,12 @@ async def serve_soundcloud_file(file_path: str, background_tasks: BackgroundTask
         if not os.path.exists(normalized_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Schedule file deletion after serving
-        background_tasks.add_task(delete_file, normalized_path)
-        if os.path.exists(thumbnail_path):  # Only delete if the thumbnail exists
-            background_tasks.add_task(delete_file, thumbnail_path)
-
-        # Serve the audio file
-        return FileResponse(
-            path=normalized_path,
+        # Serve the audio file (resumable); it and its thumbnail are deleted after a complete transfer
+        return serve_download(
+            normalized_path,
             media_type="audio/mpeg",
-            filename=os.path.basename(normalized_path),  # Force the correct filename in the download
+            delete=delete_file,
+            companions=[thumbnail_path] if os.path.exists(thumbnail_path) else [],
         )
     except Exception as e:
         print(f"Error in serve_soundcloud_file route: {str(e)}")
@@ -0,0 +1,116 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.services.stream_service import (
+    STREAM_FORMATS,
+    AUDIO_STREAM_FORMATS,
+    AUDIO_BITRATES,
+    get_stream,
+    forget_stream,
+    transcode_to_mp3,
+)
+from app.utils.http_client import get_http_client
+from app.utils.file_utils import content_disposition
+
+# Initialize router
+stream_router = APIRouter()
+
+# Request headers forwarded to the platform so seeking and resuming work
+FORWARDED_REQUEST_HEADERS = ("range", "if-range")
+# Response headers relayed to the client
+RELAYED_RESPONSE_HEADERS = ("content-length", "content-range", "accept-ranges", "etag", "last-modified")
+
+MEDIA_TYPES = {"mp4": "video/mp4", "webm": "video/webm", "m4a": "audio/mp4", "mp3": "audio/mpeg"}
+
+
+@stream_router.get("/stream/{platform}")
+async def stream_media(platform: str, url: str, request: Request):
+    """
+    Streams a video straight from the platform to the client without storing it.
+    Supports HTTP Range requests; only progressive single-file formats can be streamed.
+    """
+    platform = platform.lower()
+    if platform not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Streaming is not supported for {platform}")
+
+    try:
+        stream = await get_stream(platform, url)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"Error in stream_media route: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = dict(stream["http_headers"])
+    for name in FORWARDED_REQUEST_HEADERS:
+        if name in request.headers:
+            headers[name] = request.headers[name]
+
+    client = get_http_client()
+    try:
+        upstream = await client.send(client.build_request("GET", stream["url"], headers=headers), stream=True)
+    except Exception as e:
+        print(f"Error in stream_media route: {str(e)}")
+        raise HTTPException(status_code=502, detail=f"Error contacting {platform}: {str(e)}")
+
+    if upstream.status_code >= 400:
+        await upstream.aclose()
+        # Direct URLs expire; the next request resolves a fresh one
+        forget_stream(platform, url)
+        if upstream.status_code == 416:
+            raise HTTPException(status_code=416, detail="Requested range not satisfiable")
+        raise HTTPException(status_code=502, detail=f"{platform} answered with status {upstream.status_code}")
+
+    response_headers = {
+        name: upstream.headers[name] for name in RELAYED_RESPONSE_HEADERS if name in upstream.headers
+    }
+    response_headers.setdefault("accept-ranges", "bytes")
+    response_headers["content-disposition"] = content_disposition(f"{stream['title']}.{stream['ext']}")
+
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=response_headers,
+        media_type=MEDIA_TYPES.get(stream["ext"], "application/octet-stream"),
+        background=BackgroundTask(upstream.aclose),
+    )
+
+
+@stream_router.get("/stream/{platform}/audio")
+async def stream_audio(platform: str, url: str, quality: Optional[str] = None):
+    """
+    Streams a track as MP3, encoding it with ffmpeg while the source is downloaded.
+    Nothing is stored on disk; the quality (e.g. "192kbps") defaults to 192 kbps.
+    """
+    platform = platform.lower()
+    if platform not in AUDIO_STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Audio streaming is not supported for {platform}")
+    bitrate = (quality or "192").lower().removesuffix("kbps")
+    if bitrate not in AUDIO_BITRATES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid quality. Choose from {', '.join(f'{rate}kbps' for rate in AUDIO_BITRATES)}.",
+        )
+
+    try:
+        stream = await get_stream(platform, url, kind="audio")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        print(f"Error in stream_audio route: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    try:
+        chunks = await transcode_to_mp3(stream, bitrate)
+    except Exception as e:
+        print(f"Error in stream_audio route: {str(e)}")
+        # The direct URL may have expired; the next request resolves a fresh one
+        forget_stream(platform, url, kind="audio")
+        raise HTTPException(status_code=502, detail=str(e))
+
+    return StreamingResponse(
+        chunks,
+        media_type="audio/mpeg",
+        headers={"content-disposition": content_disposition(f"{stream['title']}_{bitrate}kbps.mp3")},
+    )
@@ -0,0 +1,55 @@
+import os
+import asyncio
+from typing import Optional
+from email.utils import formatdate
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from app.utils import metadata_cache
+from app.utils.file_utils import is_not_modified
+from app.utils.thumbnail_cache import (
+    THUMBNAIL_WIDTHS,
+    THUMBNAIL_FORMATS,
+    THUMBNAIL_MAX_AGE_SECONDS,
+    find_thumbnail,
+    get_thumbnail,
+    media_type_of,
+)
+
+# Initialize router
+thumbnail_router = APIRouter()
+
+
+@thumbnail_router.get("/thumbnails/{media_id:path}")
+async def serve_thumbnail(media_id: str, request: Request, w: Optional[int] = None, format: Optional[str] = None):
+    """
+    Serves the thumbnail of a media extracted by this service (e.g. /thumbnails/youtube:dQw4w9WgXcQ).
+    Pass ``w`` (160, 320, 480, 640 or 1280) for a downscaled variant, encoded as ``format`` (webp or jpeg).
+    """
+    if w is not None and w not in THUMBNAIL_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"Invalid width. Choose from {', '.join(map(str, THUMBNAIL_WIDTHS))}.")
+    if format is not None and format not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Choose from {', '.join(THUMBNAIL_FORMATS)}.")
+
+    # The cache file name only depends on the media ID, so any worker can serve it
+    path = await asyncio.to_thread(find_thumbnail, media_id, w, format)
+    if not path:
+        # Only thumbnails of known media are proxied
+        metadata = await asyncio.to_thread(metadata_cache.get_by_key, media_id)
+        if not metadata or not metadata.get("thumbnail"):
+            raise HTTPException(status_code=404, detail="Thumbnail not found")
+
+        try:
+            path = await get_thumbnail(media_id, metadata["thumbnail"], w, format)
+        except Exception as e:
+            print(f"Error in serve_thumbnail route: {str(e)}")
+            raise HTTPException(status_code=502, detail=f"Error fetching thumbnail: {str(e)}")
+
+    stat = os.stat(path)
+    headers = {
+        "etag": f'"{os.path.basename(path)}-{stat.st_size}-{int(stat.st_mtime)}"',
+        "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        "cache-control": f"public, max-age={THUMBNAIL_MAX_AGE_SECONDS}",
+    }
+    if is_not_modified(request.headers, headers["etag"], stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type_of(path), headers=headers)
@@ -1,7 +1,7 @@
 import os
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from app.services.tiktok_service import download_tiktok_video
-from fastapi.responses import FileResponse
+from app.utils.file_serving import serve_download
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -24,7 +24,7 @@ async def tiktok_download(request: TikTokDownloadRequest):
     """
     try:
         # Use the TikTok service to download the video
-        data = download_tiktok_video(request.url)
+        data = await download_tiktok_video(request.url)
         return {
             "message": "Video downloaded successfully",
             "file_path": data["file_path"],
@@ -37,12 +37,11 @@ async def tiktok_download(request: TikTokDownloadRequest):
 
 
 @tiktok_router.get("/tiktok/download/file")
-async def serve_tiktok_file(file_path: str, background_tasks: BackgroundTasks):
+async def serve_tiktok_file(file_path: str):
     """
     Serves a TikTok file for direct download.
-    Deletes the file after the user completes the download.
+    Deletes the file once the user completes the download, unless the download cache keeps it.
     :param file_path: Relative path to the file to download.
-    :param background_tasks: BackgroundTasks for handling cleanup.
     """
     try:
         # Normalize the file path
@@ -52,14 +51,10 @@ async def serve_tiktok_file(file_path: str, background_tasks: BackgroundTasks):
         if not os.path.exists(normalized_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Schedule file deletion after the response is completed
-        background_tasks.add_task(os.remove, normalized_path)
-
-        # Serve the file
-        return FileResponse(
-            path=normalized_path,
+        # Serve the file (resumable); it is deleted after a complete transfer
+        return serve_download(
+            normalized_path,
             media_type="video/mp4",  # Adjust media type if needed
-            filename=os.path.basename(normalized_path),  # Force the filename in the download
         )
     except Exception as e:
         print(f"Error in serve_tiktok_file route: {str(e)}")
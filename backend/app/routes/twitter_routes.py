@@ -1,7 +1,7 @@
 import os
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from app.services.twitter_service import download_twitter_video
-from fastapi.responses import FileResponse
+from app.utils.file_serving import serve_download
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -21,7 +21,7 @@ async def twitter_download(request: TwitterDownloadRequest):
     """
     try:
         # Use the Twitter service to download the video
-        data = download_twitter_video(request.url)
+        data = await download_twitter_video(request.url)
         return {
             "message": "Video downloaded successfully",
             "file_path": data["file_path"],
@@ -34,24 +34,20 @@ async def twitter_download(request: TwitterDownloadRequest):
 
 
 @twitter_router.get("/twitter/download/file")
-async def serve_twitter_file(file_path: str, background_tasks: BackgroundTasks):
+async def serve_twitter_file(file_path: str):
     """
     Serves a Twitter file for direct download.
-    Deletes the file after the user completes the download.
+    Deletes the file once the user completes the download, unless the download cache keeps it.
     """
     try:
         normalized_path = os.path.join(DOWNLOAD_FOLDER, os.path.basename(file_path))
         if not os.path.exists(normalized_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Schedule file deletion after the response is completed
-        background_tasks.add_task(os.remove, normalized_path)
-
-        # Serve the file
-        return FileResponse(
-            path=normalized_path,
+        # Serve the file (resumable); it is deleted after a complete transfer
+        return serve_download(
+            normalized_path,
             media_type="video/mp4",
-            filename=os.path.basename(normalized_path),
         )
     except Exception as e:
         print(f"Error in serve_twitter_file route: {str(e)}")
@@ -1,8 +1,8 @@
 import os
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from app.services.youtube_service import download_audio, download_video
-from fastapi.responses import FileResponse
+from app.utils.file_serving import serve_download
 
 youtube_router = APIRouter()
 from dotenv import load_dotenv
@@ -23,7 +23,7 @@ class VideoDownloadRequest(BaseModel):
 @youtube_router.post("/youtube/download/audio")
 async def audio_download(request: AudioDownloadRequest):
     try:
-        data = download_audio(request.url, request.quality)
+        data = await download_audio(request.url, request.quality)
         return {
             "message": "Audio downloaded successfully",
             "file_path": data["file_path"],
@@ -37,7 +37,7 @@ async def audio_download(request: AudioDownloadRequest):
 @youtube_router.post("/youtube/download/video")
 async def video_download(request: VideoDownloadRequest):
     try:
-        data = download_video(request.url)
+        data = await download_video(request.url)
         return {
             "message": "Video downloaded successfully",
             "file_path": data["file_path"],
@@ -49,18 +49,15 @@ async def video_download(request: VideoDownloadRequest):
 
 
 @youtube_router.get("/youtube/download/file")
-async def serve_file(file_path: str, background_tasks: BackgroundTasks):
+async def serve_file(file_path: str):
     try:
         normalized_path = os.path.join(DOWNLOAD_FOLDER, os.path.basename(file_path))
         if not os.path.exists(normalized_path):
             raise HTTPException(status_code=404, detail="File not found")
 
-        background_tasks.add_task(os.remove, normalized_path)
-
-        return FileResponse(
+        return serve_download(
             normalized_path,
             media_type="application/octet-stream",
-            filename=os.path.basename(normalized_path),
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
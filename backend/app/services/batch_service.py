@@ -0,0 +1,137 @@
+import os
+import time
+import asyncio
+import zipfile
+from dotenv import load_dotenv
+from app.services import engine
+from app.utils import download_cache, disk_quota
+
+# Load environment variables
+load_dotenv()
+# Maximum number of links accepted in one batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+# Bytes read from a downloaded file per ZIP chunk
+BATCH_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipStream:
+    """
+    Write-only, non-seekable file object collecting what zipfile writes until it is sent.
+    zipfile falls back to data descriptors when it cannot seek back.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _unique_name(name: str, used: set) -> str:
+    base, ext = os.path.splitext(name)
+    counter = 1
+    while name in used:
+        name = f"{base} ({counter}){ext}"
+        counter += 1
+    used.add(name)
+    return name
+
+
+def _cleanup(paths: list):
+    """
+    Deletes files downloaded for a batch once they are in the archive; files kept by the
+    download cache stay for later requests.
+    """
+    for path in paths:
+        if download_cache.is_cached(path):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        disk_quota.forget(path)
+
+
+async def stream_zip(items: list):
+    """
+    Downloads every item in parallel (bounded by the per-platform limits of the executor)
+    and yields a ZIP archive containing them, adding each file as soon as its download ends.
+    Entries are stored without compression because media files are already compressed.
+    Failed items are listed in an errors.txt entry.
+
+    :param items: Dictionaries with platform, kind, url and quality.
+    :return: Async iterator over the bytes of the archive.
+    """
+    # Files acquired by finished downloads and not released yet
+    pinned = []
+
+    async def run(item: dict):
+        try:
+            result = await engine.download_media(item["platform"], item["kind"], item["url"], item["quality"])
+        except Exception as e:
+            return item, None, getattr(e, "detail", None) or str(e), False
+        # Pinned right away, so the cache cannot evict it while earlier entries are streamed
+        path = os.path.join(engine.DOWNLOAD_FOLDER, result["file_path"])
+        cached = download_cache.acquire(path)
+        if cached:
+            pinned.append(path)
+        return item, result, None, cached
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    stream = _ZipStream()
+    used_names = set()
+    # Coalesced items share one file: it is archived and deleted once
+    archived = set()
+    errors = []
+    try:
+        with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_STORED) as archive:
+            for next_done in asyncio.as_completed(tasks):
+                item, result, error, cached = await next_done
+                if error:
+                    errors.append(f"{item['url']}: {error}")
+                    continue
+
+                path = os.path.join(engine.DOWNLOAD_FOLDER, result["file_path"])
+                try:
+                    if path in archived:
+                        continue
+                    archived.add(path)
+                    entry = zipfile.ZipInfo(_unique_name(disk_quota.display_name(path), used_names), time.localtime()[:6])
+                    entry.compress_type = zipfile.ZIP_STORED
+                    with open(path, "rb") as source, archive.open(entry, "w", force_zip64=True) as target:
+                        while True:
+                            chunk = await asyncio.to_thread(source.read, BATCH_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            target.write(chunk)
+                            yield stream.take()
+                except OSError as e:
+                    print(f"Error adding {path} to the batch archive: {str(e)}")
+                    errors.append(f"{item['url']}: {str(e)}")
+                finally:
+                    if cached:
+                        pinned.remove(path)
+                        download_cache.release(path)
+                companions = [os.path.join(engine.DOWNLOAD_FOLDER, result["thumbnail_file"])] if result.get("thumbnail_file") else []
+                await asyncio.to_thread(_cleanup, [path, *companions])
+                yield stream.take()
+
+            if errors:
+                archive.writestr("errors.txt", "\n".join(errors) + "\n")
+        # Central directory written when the archive is closed
+        yield stream.take()
+    finally:
+        # The client went away: stop waiting for the remaining downloads
+        for task in tasks:
+            task.cancel()
+        for path in pinned:
+            download_cache.release(path)
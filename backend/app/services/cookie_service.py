@@ -0,0 +1,36 @@
+from pymongo import UpdateOne
+from app.database import DatabaseUnavailable, database_configured, get_db
+from app.utils.write_buffer import WriteBuffer
+
+
+async def _store_cookies(batch: dict):
+    """
+    Upserts a batch of cookie consent entries with a single bulk_write.
+    """
+    await get_db()["cookies"].bulk_write(
+        [
+            UpdateOne({"session_id": session_id}, {"$set": user_entry}, upsert=True)
+            for session_id, user_entry in batch.items()
+        ],
+        ordered=False,
+    )
+
+
+# session_id -> consent entry not stored yet
+cookie_writes = WriteBuffer("cookies", _store_cookies)
+
+
+def log_cookies(session_id: str, terms_accepted: bool = False, timestamp=None):
+    """
+    Records a user's cookie and terms acceptance status. The entry is stored with the
+    next batch, so the request does not wait for the database.
+
+    :raises DatabaseUnavailable: If no database is configured.
+    """
+    if not database_configured():
+        raise DatabaseUnavailable("MONGO_URI not set in environment variables")
+    cookie_writes.add(session_id, {
+        "session_id": session_id,
+        "terms_accepted": terms_accepted,
+        "timestamp": timestamp,
+    })
@@ -0,0 +1,602 @@
+import os
+import re
+import uuid
+import subprocess
+import yt_dlp
+from urllib.parse import quote
+from yt_dlp.utils import DownloadCancelled
+from fastapi import HTTPException
+from dotenv import load_dotenv
+from app.utils.file_utils import sanitize_filename
+from app.utils.ydl_utils import add_postprocessors, download_from_info, download_formats_parallel, escape_outtmpl
+from app.utils.download_cache import make_key, get_or_download
+from app.utils import download_cache
+from app.utils.executor import run_blocking
+from app.utils.single_flight import single_flight
+from app.utils.url_utils import media_key
+from app.utils import metadata_cache, disk_quota
+from app.utils.http_client import fetch_to_file_threadsafe
+
+# Load environment variables
+load_dotenv()
+# Folder where downloaded files will be stored
+DOWNLOAD_FOLDER = os.getenv("DOWNLOAD_FOLDER", "/tmp/downloads")
+COOKIES_FILE = os.path.join(os.path.dirname(__file__), "cookies.txt")
+# Seconds to wait for a thumbnail once the media is downloaded
+THUMBNAIL_TIMEOUT_SECONDS = float(os.getenv("THUMBNAIL_TIMEOUT_SECONDS", "10"))
+# Default number of fragments of a DASH/HLS format fetched at the same time
+# (override per platform with e.g. YOUTUBE_FRAGMENT_CONCURRENCY)
+DEFAULT_FRAGMENT_CONCURRENCY = int(os.getenv("FRAGMENT_CONCURRENCY", "4"))
+# Fetch the video and audio of a merged format (bestvideo+bestaudio) at the same time
+PARALLEL_FORMAT_DOWNLOADS = os.getenv("PARALLEL_FORMAT_DOWNLOADS", "true").lower() == "true"
+# Maximum number of entries taken from a playlist, set or channel
+PLAYLIST_MAX_ITEMS = int(os.getenv("PLAYLIST_MAX_ITEMS", "200"))
+
+PLACEHOLDER_THUMBNAIL = "https://via.placeholder.com/640x360?text=No+Thumbnail"
+BROWSER_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# platform -> download profile
+#   name: display name used in messages
+#   options: yt-dlp options shared by extraction and download (headers, cookies, ...)
+#   default_thumbnail: thumbnail returned when the platform has none
+#   save_thumbnail: store the thumbnail next to the media (served and deleted with it)
+#   kinds: kind -> format selector, output extension, file name template,
+#          accepted qualities and the format used for streaming
+#     variants: quality -> settings replacing the kind's ones (format, ext) for that quality
+#     encode_from: quality downloaded once and encoded locally into the other qualities
+PLATFORM_PROFILES = {
+    "youtube": {
+        "name": "YouTube",
+        "options": {"cookiefile": COOKIES_FILE},
+        "default_thumbnail": PLACEHOLDER_THUMBNAIL,
+        "kinds": {
+            "video": {
+                "format": "best[ext=mp4]/best",
+                "ext": "mp4",
+                "filename": "{title}",
+                "stream_format": "best[ext=mp4][vcodec!=none][acodec!=none]",
+            },
+            "audio": {
+                "format": "bestaudio/best",
+                "ext": "mp3",
+                "filename": "{title}_{quality}",
+                "qualities": {"320kbps": "320", "256kbps": "256", "128kbps": "128", "original": None},
+                "variants": {
+                    # AAC as served by YouTube, remuxed instead of re-encoded
+                    "original": {"format": "bestaudio[ext=m4a]/bestaudio/best", "ext": "m4a"},
+                },
+                # MP3 bitrates are encoded from the cached original instead of downloading it again
+                "encode_from": "original",
+                "stream_format": "bestaudio/best",
+            },
+        },
+    },
+    "tiktok": {
+        "name": "TikTok",
+        "options": {"user_agent": BROWSER_USER_AGENT, "nocheckcertificate": True},
+        "default_thumbnail": PLACEHOLDER_THUMBNAIL,
+        "kinds": {
+            "video": {
+                "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/mp4",
+                "ext": "mp4",
+                "filename": "{title}",
+            },
+        },
+    },
+    "instagram": {
+        "name": "Instagram",
+        "options": {},
+        "default_thumbnail": None,
+        "save_thumbnail": True,
+        "kinds": {
+            "video": {
+                "format": "best[ext=mp4]/best",
+                "ext": "mp4",
+                "filename": "{title}",
+                "stream_format": "best[ext=mp4]/best",
+            },
+        },
+    },
+    "soundcloud": {
+        "name": "SoundCloud",
+        "options": {},
+        "default_thumbnail": None,
+        "save_thumbnail": True,
+        "kinds": {
+            "audio": {
+                "format": "*_mp3/bestaudio",
+                "ext": "mp3",
+                "filename": "{title}",
+                "qualities": {"192": "192"},
+                "default_quality": "192",
+                "stream_format": "*_mp3/bestaudio",
+            },
+        },
+    },
+    "twitter": {
+        "name": "Twitter",
+        "options": {},
+        "default_thumbnail": PLACEHOLDER_THUMBNAIL,
+        "kinds": {
+            "video": {
+                "format": "best[ext=mp4]/best",
+                "ext": "mp4",
+                "filename": "{title}",
+                "stream_format": "best[ext=mp4]/best",
+            },
+        },
+    },
+    "facebook": {
+        "name": "Facebook",
+        "options": {},
+        "default_thumbnail": PLACEHOLDER_THUMBNAIL,
+        "kinds": {
+            "video": {
+                "format": "best[ext=mp4]/best",
+                "ext": "mp4",
+                "filename": "{title}",
+                "stream_format": "best[ext=mp4]/best",
+            },
+        },
+    },
+}
+
+# single-flight key of a shared download -> hooks of the callers waiting for it
+_download_hooks = {}
+
+
+def get_profile(platform: str, kind: str, quality: str = None) -> dict:
+    """
+    Returns the download profile of a platform and kind, with the settings of the
+    quality's variant applied.
+
+    :raises ValueError: If the platform or kind is not supported.
+    """
+    profile = PLATFORM_PROFILES.get(platform)
+    if profile is None or kind not in profile["kinds"]:
+        raise ValueError(f"Unsupported download: {platform} {kind}")
+    profile = profile["kinds"][kind]
+    return {**profile, **profile.get("variants", {}).get(quality, {})}
+
+
+def default_kind(platform: str) -> str:
+    """
+    Returns the kind downloaded when a request does not specify one ("video", or "audio" for SoundCloud).
+
+    :raises ValueError: If the platform is not supported.
+    """
+    if platform not in PLATFORM_PROFILES:
+        raise ValueError(f"Unsupported platform: {platform}")
+    return next(iter(PLATFORM_PROFILES[platform]["kinds"]))
+
+
+def resolve_quality(platform: str, kind: str, quality: str = None) -> str:
+    """
+    Validates the requested quality of a download, applying the profile default.
+
+    :return: The quality, or None for kinds without quality levels.
+    :raises ValueError: If the quality is missing or not offered.
+    """
+    qualities = get_profile(platform, kind).get("qualities")
+    if not qualities:
+        return None
+    quality = quality or get_profile(platform, kind).get("default_quality")
+    if quality not in qualities:
+        raise ValueError(f"Invalid quality. Choose from {', '.join(qualities)}.")
+    return quality
+
+
+def get_fragment_concurrency(platform: str) -> int:
+    """
+    Returns the number of fragments downloaded in parallel for a platform.
+
+    :param platform: Platform name (youtube, tiktok, ...).
+    :return: Fragment concurrency.
+    """
+    value = os.getenv(f"{platform.upper()}_FRAGMENT_CONCURRENCY")
+    return max(1, int(value)) if value else DEFAULT_FRAGMENT_CONCURRENCY
+
+
+def build_options(platform: str, fmt: str = None, **extra) -> dict:
+    """
+    Builds yt-dlp options from the platform profile.
+
+    :param platform: Platform name.
+    :param fmt: Format selector, if any.
+    :param extra: Additional options (hooks, postprocessors, ...).
+    :return: yt-dlp options.
+    """
+    ydl_opts = {
+        "quiet": True,
+        "concurrent_fragment_downloads": get_fragment_concurrency(platform),
+        **PLATFORM_PROFILES[platform]["options"],
+        **extra,
+    }
+    if fmt:
+        ydl_opts["format"] = fmt
+    # yt-dlp fails on a cookie file that does not exist
+    if ydl_opts.get("cookiefile") and not os.path.exists(ydl_opts["cookiefile"]):
+        del ydl_opts["cookiefile"]
+    return ydl_opts
+
+
+def summarize_info(platform: str, info: dict) -> dict:
+    """
+    Keeps the title and thumbnail of a yt-dlp info dict or cached metadata.
+    """
+    return {
+        "title": info.get("title", "Unknown Title"),
+        "thumbnail": info.get("thumbnail", PLATFORM_PROFILES[platform]["default_thumbnail"]),
+    }
+
+
+def thumbnail_proxy_url(platform: str, url: str, info: dict) -> str:
+    """
+    Returns the path of the cached thumbnail endpoint for extracted media, or None without thumbnail.
+    """
+    if not info.get("thumbnail"):
+        return None
+    return f"/thumbnails/{quote(media_key(platform, url), safe=':/')}"
+
+
+def get_info(platform: str, url: str) -> dict:
+    """
+    Retrieves basic media information, including the title and thumbnail.
+
+    :param platform: Platform name.
+    :param url: Media URL.
+    :return: Dictionary containing title, thumbnail URL and cached thumbnail path.
+    """
+    info = metadata_cache.get(platform, url)
+    try:
+        if not info:
+            with yt_dlp.YoutubeDL(build_options(platform)) as ydl:
+                info = metadata_cache.put(platform, url, ydl.extract_info(url, download=False))
+        return {**summarize_info(platform, info), "thumbnail_proxy": thumbnail_proxy_url(platform, url, info)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving media info: {str(e)}")
+
+
+def list_entries(platform: str, url: str, max_items: int = None) -> dict:
+    """
+    Lists the entries of a playlist, SoundCloud set or channel without extracting them
+    (yt-dlp ``extract_flat``), so enumerating a long playlist only costs its listing pages.
+    A URL pointing to a single media is returned as a playlist of one entry.
+
+    :param platform: Platform name.
+    :param url: Playlist URL.
+    :param max_items: Maximum number of entries (PLAYLIST_MAX_ITEMS at most).
+    :return: Dictionary with the playlist title and its entries (url, title).
+    """
+    limit = min(max_items or PLAYLIST_MAX_ITEMS, PLAYLIST_MAX_ITEMS)
+    try:
+        with yt_dlp.YoutubeDL(build_options(platform, extract_flat="in_playlist", playlistend=limit)) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving playlist: {str(e)}")
+
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return {"title": info.get("title"), "entries": [{"url": url, "title": info.get("title")}]}
+    entries = []
+    # Entries may be a lazy generator; stop reading it at the limit
+    for entry in info.get("entries") or []:
+        if len(entries) >= limit:
+            break
+        if not entry:
+            continue
+        # Flat entries only carry their URL; extracted ones link back to their own page
+        entry_url = entry.get("url") if entry.get("_type") in ("url", "url_transparent") else entry.get("webpage_url")
+        if not entry_url or entry_url == url:
+            entry_url = entry.get("url")
+        if entry_url:
+            entries.append({"url": entry_url, "title": entry.get("title")})
+    return {"title": info.get("title"), "entries": entries}
+
+
+def make_output_path(platform: str, kind: str, info: dict, quality: str = None) -> str:
+    """
+    Builds a collision-free output path from the media ID and a random token, so no
+    existence checks are needed and concurrent downloads never share a file.
+    The human-readable title is only used in Content-Disposition (see disk_quota.track()).
+
+    :return: Path such as DOWNLOAD_FOLDER/youtube-dQw4w9WgXcQ-audio-320kbps-1f2e3d4c5b6a.mp3.
+    """
+    media_id = re.sub(r"[^\w-]", "_", str(info.get("id") or "media"))[:64]
+    parts = [platform, media_id, kind, quality, uuid.uuid4().hex[:12]]
+    name = "-".join(part for part in parts if part)
+    return os.path.join(DOWNLOAD_FOLDER, f"{name}.{get_profile(platform, kind, quality)['ext']}")
+
+
+def select_postprocessors(profile: dict, quality: str, info: dict) -> list:
+    """
+    Chooses the ffmpeg postprocessing of an audio download from the format yt-dlp selected.
+    A source already in the output format (e.g. SoundCloud MP3, YouTube M4A) is kept as
+    it is; FFmpegExtractAudio copies the stream when only the container differs and
+    re-encodes only when the codecs differ.
+
+    :param profile: Download profile returned by get_profile().
+    :param quality: Resolved quality.
+    :param info: Resolved info dict of the selected format.
+    :return: yt-dlp postprocessor definitions, empty when the download needs none.
+    """
+    if info.get("ext") == profile["ext"]:
+        return []
+    return [{
+        "key": "FFmpegExtractAudio",
+        "preferredcodec": profile["ext"],
+        "preferredquality": profile["qualities"][quality],
+    }]
+
+
+def encode_audio(source_file: str, output_file: str, bitrate: str):
+    """
+    Encodes a local audio file with ffmpeg; the codec follows the output extension.
+
+    :param source_file: Path of the source audio.
+    :param output_file: Path of the encoded file.
+    :param bitrate: Bitrate in kbps (e.g. "320").
+    :raises RuntimeError: If ffmpeg fails.
+    """
+    command = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+        "-i", source_file, "-vn", "-map_metadata", "0", "-b:a", f"{bitrate}k", output_file,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.strip()}")
+
+
+def save_thumbnail(thumbnail_url: str, media_file: str):
+    """
+    Starts downloading a thumbnail next to its media file, without waiting for it.
+
+    :param thumbnail_url: URL of the image.
+    :param media_file: Path of the media file the thumbnail belongs to.
+    :return: Future resolving to the saved path.
+    """
+    return fetch_to_file_threadsafe(thumbnail_url, f"{os.path.splitext(media_file)[0]}_thumbnail.jpg")
+
+
+def wait_thumbnail(future) -> str:
+    """
+    Waits for a thumbnail started with save_thumbnail().
+
+    :return: The saved path, or None if the image could not be downloaded.
+    """
+    try:
+        return future.result(timeout=THUMBNAIL_TIMEOUT_SECONDS)
+    except Exception as e:
+        print(f"Error downloading thumbnail: {str(e)}")
+        future.cancel()
+        return None
+
+
+def download(platform: str, kind: str, url: str, quality: str = None,
+             progress_hooks: list = None, postprocessor_hooks: list = None) -> dict:
+    """
+    Downloads media with the platform profile. The URL is extracted once, repeated
+    requests are served from the download cache and identical concurrent downloads are shared.
+
+    :param platform: Platform name.
+    :param kind: "video" or "audio".
+    :param url: Media URL.
+    :param quality: Quality level for kinds that offer them (e.g. "320kbps").
+    :param progress_hooks: Optional yt-dlp progress hooks.
+    :param postprocessor_hooks: Optional yt-dlp postprocessor hooks.
+    :return: Dictionary with the file name, thumbnail URL, saved thumbnail file (if any),
+        cached thumbnail path and title.
+    :raises ValueError: If the platform, kind or quality is not supported.
+    """
+    quality = resolve_quality(platform, kind, quality)
+    profile = get_profile(platform, kind, quality)
+    platform_profile = PLATFORM_PROFILES[platform]
+    if profile.get("encode_from") and quality != profile["encode_from"]:
+        return _encode_from_source(platform, kind, url, quality, progress_hooks, postprocessor_hooks)
+    # Thumbnail stored next to the media (served and deleted with it), fetched while the media downloads
+    thumbnail_future = None
+
+    def start_thumbnail(media_file: str, thumbnail_url: str):
+        nonlocal thumbnail_future
+        if platform_profile.get("save_thumbnail") and thumbnail_url and thumbnail_future is None:
+            thumbnail_future = save_thumbnail(thumbnail_url, media_file)
+
+    try:
+        ydl_opts = build_options(
+            platform,
+            profile["format"],
+            merge_output_format=profile["ext"] if kind == "video" else None,
+            progress_hooks=progress_hooks or [],
+            postprocessor_hooks=postprocessor_hooks or [],
+        )
+
+        print(f"Downloading {platform_profile['name']} {kind} from URL: {url}")
+        # A repeated request for media that is already downloaded needs no extraction at all
+        output_file, cached_info = metadata_cache.find_cached_download(platform, url, profile["format"], quality)
+        if output_file:
+            media_info = summarize_info(platform, cached_info)
+            thumbnail_proxy = thumbnail_proxy_url(platform, url, cached_info)
+        else:
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                # Extract once and download from the resolved info dict
+                info = ydl.extract_info(url, download=False)
+                metadata_cache.put(platform, url, info)
+                media_info = summarize_info(platform, info)
+                thumbnail_proxy = thumbnail_proxy_url(platform, url, info)
+
+                def download_file():
+                    output_file = make_output_path(platform, kind, info, quality)
+                    # Written under a temporary name and renamed when complete, so the final
+                    # path never holds a partial file
+                    temp_base = f"{os.path.splitext(output_file)[0]}.tmp"
+                    temp_file = f"{temp_base}.{profile['ext']}"
+                    start_thumbnail(output_file, media_info["thumbnail"])
+                    try:
+                        # Postprocessing depends on the selected format, so it is only known now
+                        postprocessors = select_postprocessors(profile, quality, info) if kind == "audio" else []
+                        add_postprocessors(ydl, postprocessors)
+                        # Postprocessors replace the extension of the downloaded source
+                        outtmpl = f"{escape_outtmpl(temp_base)}.%(ext)s" if postprocessors else escape_outtmpl(temp_file)
+                        # Merged formats are fetched in parallel; everything else goes through yt-dlp
+                        if postprocessors or not PARALLEL_FORMAT_DOWNLOADS or not download_formats_parallel(ydl, info, temp_file):
+                            download_from_info(ydl, info, outtmpl)
+
+                        if not os.path.exists(temp_file):
+                            raise Exception(f"Failed to download the {kind} in {profile['ext'].upper()} format.")
+                        os.replace(temp_file, output_file)
+                    except Exception:
+                        # Failed or cancelled: nothing will resume the partial files
+                        disk_quota.remove_temp_files(temp_base)
+                        raise
+                    display_name = profile["filename"].format(title=sanitize_filename(media_info["title"]), quality=quality)
+                    disk_quota.track(output_file, filename=f"{display_name}.{profile['ext']}")
+                    return output_file
+
+                # Reuse a previous download of the same media, format and quality
+                output_file = get_or_download(make_key(platform, info, profile["format"], quality), download_file)
+
+        # Cached and shared downloads did not start the thumbnail yet
+        start_thumbnail(output_file, media_info["thumbnail"])
+        thumbnail_file = wait_thumbnail(thumbnail_future) if thumbnail_future else None
+        if thumbnail_file:
+            disk_quota.track(thumbnail_file)
+
+        print(f"{platform_profile['name']} {kind} downloaded and saved to: {output_file}")
+        return {
+            "message": f"{kind.capitalize()} downloaded successfully",
+            "file_path": os.path.basename(output_file),
+            "thumbnail": media_info["thumbnail"],
+            "thumbnail_file": os.path.basename(thumbnail_file) if thumbnail_file else None,
+            "thumbnail_proxy": thumbnail_proxy,
+            "title": media_info["title"],
+        }
+    except Exception as e:
+        if thumbnail_future:
+            thumbnail_future.cancel()
+        print(f"Error downloading {platform_profile['name']} {kind}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error downloading {platform_profile['name']} {kind}: {str(e)}")
+
+
+def _encode_from_source(platform: str, kind: str, url: str, quality: str,
+                        progress_hooks: list = None, postprocessor_hooks: list = None) -> dict:
+    """
+    Produces a quality by encoding the download of the profile's ``encode_from`` quality,
+    which is kept by the download cache: the media is downloaded once per media ID and
+    every other quality only costs a local encode.
+
+    :return: Same dictionary as download().
+    """
+    profile = get_profile(platform, kind, quality)
+    platform_profile = PLATFORM_PROFILES[platform]
+    output_file, cached_info = metadata_cache.find_cached_download(platform, url, profile["format"], quality)
+    if output_file:
+        return {
+            "message": f"{kind.capitalize()} downloaded successfully",
+            "file_path": os.path.basename(output_file),
+            **summarize_info(platform, cached_info),
+            "thumbnail_file": None,
+            "thumbnail_proxy": thumbnail_proxy_url(platform, url, cached_info),
+        }
+
+    source = download(platform, kind, url, profile["encode_from"], progress_hooks, postprocessor_hooks)
+    source_file = os.path.join(DOWNLOAD_FOLDER, source["file_path"])
+    # Saved by the source download; gives the canonical media ID for the cache key
+    info = metadata_cache.get(platform, url)
+
+    def encode_file():
+        for hook in postprocessor_hooks or []:
+            hook({"status": "started", "postprocessor": "ExtractAudio", "info_dict": {}})
+        output_file = make_output_path(platform, kind, info or {}, quality)
+        temp_file = f"{os.path.splitext(output_file)[0]}.tmp.{profile['ext']}"
+        try:
+            encode_audio(source_file, temp_file, profile["qualities"][quality])
+            os.replace(temp_file, output_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+        display_name = profile["filename"].format(title=sanitize_filename(source["title"]), quality=quality)
+        disk_quota.track(output_file, filename=f"{display_name}.{profile['ext']}")
+        return output_file
+
+    print(f"Encoding {platform_profile['name']} {kind} at {quality} from: {source_file}")
+    # Keep the source from being evicted while it is encoded
+    cached = download_cache.acquire(source_file)
+    try:
+        if info:
+            output_file = get_or_download(make_key(platform, info, profile["format"], quality), encode_file)
+        else:
+            output_file = encode_file()
+    except Exception as e:
+        print(f"Error encoding {platform_profile['name']} {kind}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error downloading {platform_profile['name']} {kind}: {str(e)}")
+    finally:
+        if cached:
+            download_cache.release(source_file)
+        else:
+            # Without the download cache nobody else will reuse the source
+            try:
+                os.remove(source_file)
+            except OSError:
+                pass
+            disk_quota.forget(source_file)
+
+    print(f"{platform_profile['name']} {kind} downloaded and saved to: {output_file}")
+    return {**source, "message": f"{kind.capitalize()} downloaded successfully", "file_path": os.path.basename(output_file)}
+
+
+def _shared_hook(key: str, hook_type: str):
+    """
+    Builds a hook forwarding the events of a shared download to the hooks of every caller
+    waiting for it. A caller's hook raising DownloadCancelled (e.g. a cancelled job) only
+    detaches that caller; the download stops once no caller waits for it anymore.
+    Runs in the download thread.
+    """
+    def hook(d: dict):
+        callers = list(_download_hooks.get(key, ()))
+        for caller in callers:
+            try:
+                for caller_hook in caller[hook_type]:
+                    caller_hook(d)
+            except DownloadCancelled:
+                caller["cancelled"] = True
+        if all(caller["cancelled"] for caller in callers):
+            raise DownloadCancelled()
+    return hook
+
+
+async def download_media(platform: str, kind: str, url: str, quality: str = None,
+                         progress_hooks: list = None, postprocessor_hooks: list = None) -> dict:
+    """
+    Runs download() in the shared executor, sharing it with concurrent requests and jobs
+    for the same media, kind and quality. The hooks of every caller receive the events of
+    the shared download.
+
+    :param progress_hooks: Optional yt-dlp progress hooks of this caller.
+    :param postprocessor_hooks: Optional yt-dlp postprocessor hooks of this caller.
+    :return: Result of download().
+    :raises ValueError: If the platform, kind or quality is not supported.
+    """
+    quality = resolve_quality(platform, kind, quality)
+    key = f"{media_key(platform, url)}:{kind}:{quality or ''}"
+    caller = {"progress": progress_hooks or [], "postprocessor": postprocessor_hooks or [], "cancelled": False}
+    # Copy-on-write so download threads can iterate the callers without locking
+    _download_hooks[key] = [*_download_hooks.get(key, ()), caller]
+    try:
+        return await single_flight(key, lambda: run_blocking(
+            platform,
+            download,
+            platform,
+            kind,
+            url,
+            quality,
+            progress_hooks=[_shared_hook(key, "progress")],
+            postprocessor_hooks=[_shared_hook(key, "postprocessor")],
+        ))
+    finally:
+        callers = [other for other in _download_hooks.get(key, ()) if other is not caller]
+        if callers:
+            _download_hooks[key] = callers
+        else:
+            _download_hooks.pop(key, None)
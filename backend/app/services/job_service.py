@@ -0,0 +1,402 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from yt_dlp.utils import DownloadCancelled
+from fastapi import HTTPException
+from dotenv import load_dotenv
+from app.utils.executor import run_blocking
+from app.services import engine
+
+# Load environment variables
+load_dotenv()
+# Seconds a finished job stays available for polling
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+# Minimum seconds between two progress events pushed to subscribers
+PROGRESS_EVENT_INTERVAL = float(os.getenv("PROGRESS_EVENT_INTERVAL", "0.5"))
+# Playlist items downloaded at the same time by one playlist job
+PLAYLIST_CONCURRENCY = int(os.getenv("PLAYLIST_CONCURRENCY", "3"))
+
+FINAL_STATES = ("finished", "error", "cancelled")
+
+jobs = {}
+_tasks = {}
+_cancel_flags = {}
+_subscribers = {}
+_last_published = {}
+_loop = None
+
+
+class JobCancelled(DownloadCancelled):
+    msg = "Download cancelled"
+
+
+def _publish(job: dict, force: bool = False):
+    """
+    Pushes a snapshot of the job to every subscribed event stream.
+    Safe to call from worker threads; progress updates are throttled.
+    """
+    job_id = job["job_id"]
+    queues = _subscribers.get(job_id)
+    if not queues or _loop is None:
+        return
+    now = time.monotonic()
+    if not force and now - _last_published.get(job_id, 0) < PROGRESS_EVENT_INTERVAL:
+        return
+    _last_published[job_id] = now
+    snapshot = get_job(job_id)
+    for queue in queues:
+        _loop.call_soon_threadsafe(_offer, queue, snapshot)
+
+
+def _publish_item(item: dict):
+    """
+    Pushes the progress of a playlist item to the streams of its playlist job; a finished
+    item is sent to them as well, so clients get each result as soon as it is ready.
+    """
+    playlist = jobs.get(item["parent_id"])
+    if not playlist:
+        return
+    if item["status"] in FINAL_STATES and _loop is not None:
+        snapshot = get_job(item["job_id"])
+        for queue in _subscribers.get(playlist["job_id"], ()):
+            _loop.call_soon_threadsafe(_offer, queue, snapshot)
+    _publish(playlist, force=item["status"] in FINAL_STATES)
+
+
+def _offer(queue: asyncio.Queue, snapshot: dict):
+    # Slow consumers only need the latest state, so drop the oldest event
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(snapshot)
+
+
+def _progress_hook(job: dict):
+    """
+    Builds a yt-dlp progress hook that copies download progress into the job.
+    """
+    cancel_flag = _cancel_flags[job["job_id"]]
+
+    def hook(d: dict):
+        if cancel_flag.is_set():
+            raise JobCancelled()
+        status_changed = False
+        if d.get("status") == "downloading":
+            status_changed = job["status"] != "downloading"
+            job["status"] = "downloading"
+            job["phase"] = "download"
+            job["downloaded_bytes"] = d.get("downloaded_bytes") or 0
+            job["total_bytes"] = d.get("total_bytes") or d.get("total_bytes_estimate")
+            job["speed"] = d.get("speed")
+            job["eta"] = d.get("eta")
+        elif d.get("status") == "finished":
+            # yt-dlp is done with the network, postprocessors (ffmpeg) may follow
+            status_changed = True
+            job["status"] = "processing"
+            job["downloaded_bytes"] = d.get("downloaded_bytes") or job["downloaded_bytes"]
+            job["total_bytes"] = d.get("total_bytes") or job["downloaded_bytes"]
+            job["speed"] = None
+            job["eta"] = 0
+        job["updated_at"] = time.time()
+        _publish(job, force=status_changed)
+        if job["parent_id"]:
+            _publish_item(job)
+    return hook
+
+
+def _postprocessor_hook(job: dict):
+    """
+    Builds a yt-dlp postprocessor hook that reports the current postprocessing phase.
+    """
+    cancel_flag = _cancel_flags[job["job_id"]]
+
+    def hook(d: dict):
+        if cancel_flag.is_set():
+            raise JobCancelled()
+        if d.get("status") == "started":
+            job["status"] = "processing"
+            job["phase"] = d.get("postprocessor")
+            job["updated_at"] = time.time()
+            _publish(job, force=True)
+            if job["parent_id"]:
+                _publish_item(job)
+    return hook
+
+
+def _prune_jobs():
+    """
+    Forgets finished jobs older than JOB_TTL_SECONDS.
+    """
+    now = time.time()
+    for job_id in [
+        job_id for job_id, job in jobs.items()
+        if job["status"] in FINAL_STATES and now - job["updated_at"] > JOB_TTL_SECONDS
+    ]:
+        jobs.pop(job_id, None)
+        _cancel_flags.pop(job_id, None)
+        _last_published.pop(job_id, None)
+
+
+def _finish_job(job: dict, **fields):
+    job.update(fields)
+    job["updated_at"] = time.time()
+    _tasks.pop(job["job_id"], None)
+    _publish(job, force=True)
+    if job["parent_id"]:
+        _publish_item(job)
+
+
+async def _run_job(job: dict):
+    cancel_flag = _cancel_flags[job["job_id"]]
+    try:
+        # Shared with requests and jobs downloading the same media at the same time
+        result = await engine.download_media(
+            job["platform"],
+            job["kind"],
+            job["url"],
+            job["quality"],
+            progress_hooks=[_progress_hook(job)],
+            postprocessor_hooks=[_postprocessor_hook(job)],
+        )
+        _finish_job(
+            job,
+            status="finished",
+            phase=None,
+            file_path=result["file_path"],
+            thumbnail=result.get("thumbnail"),
+            title=result.get("title"),
+        )
+    except asyncio.CancelledError:
+        _finish_job(job, status="cancelled", error="Download cancelled")
+    except Exception as e:
+        if cancel_flag.is_set():
+            _finish_job(job, status="cancelled", error="Download cancelled")
+        else:
+            print(f"Error in download job {job['job_id']}: {str(e)}")
+            _finish_job(job, status="error", error=e.detail if isinstance(e, HTTPException) else str(e))
+
+
+async def _run_item(job: dict, semaphore: asyncio.Semaphore):
+    """
+    Runs a playlist item once a slot of its playlist job is free.
+    """
+    try:
+        async with semaphore:
+            if _cancel_flags[job["job_id"]].is_set():
+                raise asyncio.CancelledError()
+            await _run_job(job)
+    except asyncio.CancelledError:
+        _finish_job(job, status="cancelled", error="Download cancelled")
+
+
+async def _run_playlist(job: dict, max_items: int, concurrency: int):
+    cancel_flag = _cancel_flags[job["job_id"]]
+    try:
+        playlist = await run_blocking(job["platform"], engine.list_entries, job["platform"], job["url"], max_items)
+    except asyncio.CancelledError:
+        _finish_job(job, status="cancelled", error="Download cancelled")
+        return
+    except Exception as e:
+        print(f"Error in download job {job['job_id']}: {str(e)}")
+        _finish_job(job, status="error", error=e.detail if isinstance(e, HTTPException) else str(e))
+        return
+    if cancel_flag.is_set():
+        _finish_job(job, status="cancelled", error="Download cancelled")
+        return
+
+    items = [
+        _new_job(job["platform"], job["kind"], entry["url"], job["quality"], parent_id=job["job_id"], title=entry["title"])
+        for entry in playlist["entries"]
+    ]
+    job.update(
+        title=playlist["title"],
+        items=[item["job_id"] for item in items],
+        status="downloading",
+        updated_at=time.time(),
+    )
+    _publish(job, force=True)
+
+    # Items wait for a slot of this job, then for a worker of their platform
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+    for item in items:
+        _tasks[item["job_id"]] = asyncio.create_task(_run_item(item, semaphore))
+        tasks.append(_tasks[item["job_id"]])
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    finished = sum(1 for item in items if item["status"] == "finished")
+    if cancel_flag.is_set():
+        _finish_job(job, status="cancelled", error="Download cancelled")
+    elif finished or not items:
+        _finish_job(job, status="finished", phase=None)
+    else:
+        _finish_job(job, status="error", error="No item could be downloaded")
+
+
+def _new_job(platform: str, kind: str, url: str, quality: str, job_type: str = "media",
+             parent_id: str = None, title: str = None) -> dict:
+    """
+    Registers a job without starting it.
+    """
+    now = time.time()
+    job = {
+        "job_id": uuid.uuid4().hex,
+        "type": job_type,
+        "parent_id": parent_id,
+        "platform": platform,
+        "kind": kind,
+        "url": url,
+        "quality": quality,
+        "status": "queued",
+        "phase": None,
+        "downloaded_bytes": 0,
+        "total_bytes": None,
+        "speed": None,
+        "eta": None,
+        "file_path": None,
+        "thumbnail": None,
+        "title": title,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    if job_type == "playlist":
+        job["items"] = []
+    jobs[job["job_id"]] = job
+    _cancel_flags[job["job_id"]] = threading.Event()
+    return job
+
+
+def submit_job(platform: str, kind: str, url: str, quality: str = None) -> dict:
+    """
+    Registers a download job and starts it in the background.
+
+    :param platform: Platform name (youtube, tiktok, ...).
+    :param kind: "video" or "audio".
+    :param url: Media URL.
+    :param quality: Quality level for kinds that offer them (e.g. YouTube audio).
+    :return: The new job.
+    :raises ValueError: If the platform, kind or quality is not supported.
+    """
+    global _loop
+    quality = engine.resolve_quality(platform, kind, quality)
+
+    _prune_jobs()
+    _loop = asyncio.get_running_loop()
+    job = _new_job(platform, kind, url, quality)
+    _tasks[job["job_id"]] = asyncio.create_task(_run_job(job))
+    return job
+
+
+def submit_playlist_job(platform: str, kind: str, url: str, quality: str = None,
+                        max_items: int = None, concurrency: int = None) -> dict:
+    """
+    Registers a job downloading every entry of a playlist, SoundCloud set or channel.
+    Each entry becomes a job of its own (listed in ``items``), and at most ``concurrency``
+    of them download at the same time.
+
+    :param platform: Platform name (youtube, soundcloud, ...).
+    :param kind: "video" or "audio".
+    :param url: Playlist URL.
+    :param quality: Quality level applied to every entry.
+    :param max_items: Maximum number of entries to download.
+    :param concurrency: Entries downloaded in parallel (PLAYLIST_CONCURRENCY at most).
+    :return: The new job.
+    :raises ValueError: If the platform, kind or quality is not supported.
+    """
+    global _loop
+    quality = engine.resolve_quality(platform, kind, quality)
+    concurrency = max(1, min(concurrency or PLAYLIST_CONCURRENCY, PLAYLIST_CONCURRENCY))
+
+    _prune_jobs()
+    _loop = asyncio.get_running_loop()
+    job = _new_job(platform, kind, url, quality, job_type="playlist")
+    _tasks[job["job_id"]] = asyncio.create_task(_run_playlist(job, max_items, concurrency))
+    return job
+
+
+def cancel_job(job_id: str) -> bool:
+    """
+    Requests cancellation of a job. The job stops waiting right away; its download stops
+    at the next progress update unless other requests or jobs share it.
+
+    :param job_id: Job identifier.
+    :return: False if the job is unknown or already finished.
+    """
+    job = jobs.get(job_id)
+    if not job or job["status"] in FINAL_STATES:
+        return False
+    _cancel_flags[job_id].set()
+    for item_id in job.get("items", ()):
+        cancel_job(item_id)
+    task = _tasks.get(job_id)
+    # A playlist job finishes once its items are cancelled
+    if task and (job["type"] != "playlist" or job["status"] == "queued"):
+        task.cancel()
+    return True
+
+
+def get_job(job_id: str) -> dict:
+    """
+    Returns a job with its computed progress percentage, or None if unknown.
+    Playlist jobs report the average progress of their items and a summary of each.
+    """
+    job = jobs.get(job_id)
+    if not job:
+        return None
+    if job["type"] == "playlist":
+        return _get_playlist(job)
+    total = job["total_bytes"]
+    progress = None
+    if job["status"] in ("processing", "finished"):
+        progress = 100.0
+    elif total:
+        progress = round(min(job["downloaded_bytes"] / total, 1.0) * 100, 1)
+    return {**job, "progress": progress}
+
+
+def _get_playlist(job: dict) -> dict:
+    items = [get_job(item_id) for item_id in job["items"]]
+    items = [item for item in items if item]
+    progress = None
+    if job["status"] == "finished":
+        progress = 100.0
+    elif items:
+        progress = round(sum(item["progress"] or 0 for item in items) / len(items), 1)
+    return {
+        **job,
+        "progress": progress,
+        "total_items": len(job["items"]),
+        "finished_items": sum(1 for item in items if item["status"] == "finished"),
+        "failed_items": sum(1 for item in items if item["status"] in ("error", "cancelled")),
+        "items": [
+            {field: item[field] for field in ("job_id", "url", "title", "status", "progress", "file_path", "error")}
+            for item in items
+        ],
+    }
+
+
+def subscribe(job_id: str) -> asyncio.Queue:
+    """
+    Registers an event stream for a job and primes it with the current state.
+    """
+    queue = asyncio.Queue(maxsize=32)
+    # Copy-on-write so worker threads can iterate subscribers without locking
+    _subscribers[job_id] = _subscribers.get(job_id, frozenset()) | {queue}
+    queue.put_nowait(get_job(job_id))
+    return queue
+
+
+def unsubscribe(job_id: str, queue: asyncio.Queue) -> int:
+    """
+    Removes an event stream from a job.
+
+    :return: Number of streams still attached to the job.
+    """
+    queues = _subscribers.get(job_id, frozenset()) - {queue}
+    _subscribers[job_id] = queues
+    if not queues:
+        _subscribers.pop(job_id, None)
+        _last_published.pop(job_id, None)
+    return len(queues)
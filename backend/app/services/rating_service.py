@@ -1,45 +1,164 @@
-from app.database import db
+import os
+import time
+import asyncio
+from pymongo import ReturnDocument, UpdateOne
+from dotenv import load_dotenv
+from app.database import DatabaseUnavailable, database_configured, get_db
+from app.utils.write_buffer import WriteBuffer
+
+# Load environment variables
+load_dotenv()
+# Seconds an average rating is served from memory (and may be cached by clients and CDNs)
+RATING_CACHE_TTL_SECONDS = int(os.getenv("RATING_CACHE_TTL_SECONDS", "60"))
+
+# Aggregate document holding the sum and count of every rating
+OVERALL_AGGREGATE_ID = "overall"
+
+# aggregate ID -> (expires_at, average)
+_average_cache = {}
+# aggregate ID -> {"sum", "count"} of stored ratings not applied to the aggregates yet
+_pending_increments = {}
+
+
+def normalize_download_type(download_type: str) -> str:
+    """
+    Download types are stored in lowercase, so lookups are exact matches served by the indexes.
+    """
+    return download_type.strip().lower()
+
+
+def _aggregate_id(download_type: str) -> str:
+    """
+    Returns the ID of the aggregate document of a download type.
+    """
+    return f"type:{normalize_download_type(download_type)}"
+
+
+async def _store_rating(ratings_collection, key: tuple, rating: float):
+    """
+    Upserts one rating atomically and adds its net change to the unapplied increments:
+    a new rating adds itself, a changed one the difference.
+    """
+    user_session, download_type = key
+    previous = await ratings_collection.find_one_and_update(
+        {"user_session": user_session, "download_type": download_type},
+        {"$set": {"rating": rating}},
+        projection={"_id": 0, "rating": 1},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE,
+    )
+    old = previous["rating"] if previous else None
+    for aggregate_id in (_aggregate_id(download_type), OVERALL_AGGREGATE_ID):
+        increment = _pending_increments.setdefault(aggregate_id, {"sum": 0, "count": 0})
+        increment["sum"] += rating if old is None else rating - old
+        increment["count"] += 1 if old is None else 0
+
+
+async def _store_ratings(batch: dict):
+    """
+    Writes a batch of ratings and applies their net change to the aggregates.
+    Each rating is upserted with find_one_and_update, which returns the previous value
+    atomically, so concurrent workers and retried batches never count a rating twice.
+    Increments are kept until the aggregates accept them: a failure raises, the batch is
+    retried (its ratings then add nothing) and the kept increments are applied with it.
+    """
+    ratings_collection = get_db()["ratings"]
+    results = await asyncio.gather(
+        *(_store_rating(ratings_collection, key, rating) for key, rating in batch.items()),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        raise errors[0]
+
+    # One update per aggregate, forgotten once applied, so a failure never applies one twice
+    aggregates_collection = get_db()["rating_aggregates"]
+    for aggregate_id in list(_pending_increments):
+        increment = _pending_increments[aggregate_id]
+        if increment["sum"] or increment["count"]:
+            await aggregates_collection.update_one({"_id": aggregate_id}, {"$inc": increment}, upsert=True)
+        _pending_increments.pop(aggregate_id, None)
+        # Other workers see the change once their copy expires
+        _average_cache.pop(aggregate_id, None)
+
+
+# (user_session, download_type) -> rating not stored yet
+rating_writes = WriteBuffer("ratings", _store_ratings)
+
 
 async def add_or_update_rating(user_session: str, download_type: str, rating: float):
     if not (1 <= rating <= 5):
         raise ValueError("Rating must be between 1 and 5.")
 
-    ratings_collection = db["ratings"]
-    filter_query = {"user_session": user_session, "download_type": download_type}
-    update_data = {"$set": {"rating": rating}}
-    await ratings_collection.update_one(filter_query, update_data, upsert=True)
+    if not database_configured():
+        raise DatabaseUnavailable("MONGO_URI not set in environment variables")
+    # Stored with the next batch (see _store_ratings)
+    rating_writes.add((user_session, normalize_download_type(download_type)), rating)
     return {"message": "Rating saved successfully."}
 
 
 async def get_user_rating(user_session: str, download_type: str):
-    ratings_collection = db["ratings"]
-    rating = await ratings_collection.find_one({"user_session": user_session, "download_type": download_type})
+    key = (user_session, normalize_download_type(download_type))
+    pending = rating_writes.get(key)
+    if pending is not None:
+        return {"rating": pending}
+    ratings_collection = get_db()["ratings"]
+    rating = await ratings_collection.find_one(
+        {"user_session": key[0], "download_type": key[1]},
+        {"_id": 0, "rating": 1},
+    )
     return {"rating": rating["rating"]} if rating else None
 
 
 async def get_average_rating(download_type: str = None):
     """
-    Calculate the average rating.
-    If `download_type` is provided, calculate for that type; otherwise, calculate the overall average.
+    Return the average rating from the precomputed aggregates, cached for RATING_CACHE_TTL_SECONDS.
+    If `download_type` is provided, return it for that type; otherwise, return the overall average.
     """
-    ratings_collection = db["ratings"]
-
-    pipeline = []
-    # Add a $match stage only if download_type is provided
     if download_type and download_type != "overall":
-        pipeline.append({"$match": {"download_type": {"$regex": f"^{download_type}$", "$options": "i"}}})
-
-    pipeline.append(
-        {"$group": {"_id": None, "average_rating": {"$avg": "$rating"}, "total_ratings": {"$sum": 1}}}
-    )
+        aggregate_id = _aggregate_id(download_type)
+    else:
+        aggregate_id = OVERALL_AGGREGATE_ID
 
-    result = await ratings_collection.aggregate(pipeline).to_list(length=1)
-    print("Matching Documents:", result)
+    cached = _average_cache.get(aggregate_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
 
-    if not result:
+    aggregate = await get_db()["rating_aggregates"].find_one({"_id": aggregate_id})
+    if not aggregate or not aggregate["count"]:
+        # Not cached, so arbitrary types cannot grow the cache
         return {"average_rating": 0, "total_ratings": 0}
 
-    return {
-        "average_rating": round(result[0]["average_rating"], 2),
-        "total_ratings": result[0]["total_ratings"],
+    average = {
+        "average_rating": round(aggregate["sum"] / aggregate["count"], 2),
+        "total_ratings": aggregate["count"],
     }
+    _average_cache[aggregate_id] = (time.monotonic() + RATING_CACHE_TTL_SECONDS, average)
+    return average
+
+
+async def rebuild_rating_aggregates(force: bool = False):
+    """
+    Computes the aggregates from the ratings collection with a single $group pass.
+    Runs at startup so ratings stored before the aggregates existed are counted;
+    does nothing when the aggregates are already there, unless `force` is set.
+    Rating flushes wait meanwhile, so their increments are neither overwritten nor lost.
+    """
+    async with rating_writes.hold():
+        aggregates_collection = get_db()["rating_aggregates"]
+        if not force and await aggregates_collection.find_one({"_id": OVERALL_AGGREGATE_ID}):
+            return
+
+        pipeline = [{"$group": {"_id": {"$toLower": "$download_type"}, "sum": {"$sum": "$rating"}, "count": {"$sum": 1}}}]
+        groups = await get_db()["ratings"].aggregate(pipeline).to_list(length=None)
+        totals = {"sum": sum(group["sum"] for group in groups), "count": sum(group["count"] for group in groups)}
+        operations = [
+            UpdateOne({"_id": _aggregate_id(group["_id"] or "")}, {"$set": {"sum": group["sum"], "count": group["count"]}}, upsert=True)
+            for group in groups
+        ]
+        operations.append(UpdateOne({"_id": OVERALL_AGGREGATE_ID}, {"$set": totals}, upsert=True))
+        await aggregates_collection.bulk_write(operations, ordered=False)
+        # Already counted by the $group pass
+        _pending_increments.clear()
+        _average_cache.clear()
+        print(f"Rating aggregates rebuilt from {totals['count']} ratings")
@@ -0,0 +1,192 @@
+import os
+import time
+import anyio
+import asyncio
+import threading
+import yt_dlp
+from dotenv import load_dotenv
+from app.utils.executor import run_blocking
+from app.utils.single_flight import single_flight
+from app.utils.url_utils import media_key
+from app.utils.file_utils import sanitize_filename
+from app.utils import metadata_cache
+from app.services.engine import PLATFORM_PROFILES, build_options
+
+# Load environment variables
+load_dotenv()
+# Seconds a resolved direct URL is reused, so Range requests of one playback don't re-extract
+STREAM_URL_TTL_SECONDS = int(os.getenv("STREAM_URL_TTL_SECONDS", "300"))
+# Maximum number of ffmpeg transcodes running at the same time
+TRANSCODE_MAX_CONCURRENCY = int(os.getenv("TRANSCODE_MAX_CONCURRENCY", "4"))
+# Size of the chunks read from ffmpeg and sent to the client
+TRANSCODE_CHUNK_SIZE = 64 * 1024
+
+# platform -> format selector of the streamable kinds, from the download profiles
+STREAM_FORMATS = {
+    platform: profile["kinds"]["video"]["stream_format"]
+    for platform, profile in PLATFORM_PROFILES.items()
+    if "stream_format" in profile["kinds"].get("video", {})
+}
+AUDIO_STREAM_FORMATS = {
+    platform: profile["kinds"]["audio"]["stream_format"]
+    for platform, profile in PLATFORM_PROFILES.items()
+    if "stream_format" in profile["kinds"].get("audio", {})
+}
+
+# MP3 bitrates accepted for transcoding, in kbps
+AUDIO_BITRATES = ("128", "192", "256", "320")
+
+# ffmpeg reads these protocols itself; anything else (e.g. DASH fragments) needs yt-dlp
+TRANSCODE_PROTOCOLS = ("http", "https", "m3u8", "m3u8_native")
+
+# key -> (expires_at, stream)
+_resolved = {}
+_lock = threading.Lock()
+_transcode_semaphore = None
+
+
+def resolve_stream(platform: str, url: str, kind: str = "video") -> dict:
+    """
+    Resolves the direct URL of a progressive single-file format.
+
+    :param platform: Platform name.
+    :param url: Media URL.
+    :param kind: "video" for a format proxied as is, "audio" for a source to transcode.
+    :return: Dictionary with the direct URL, the HTTP headers it needs, extension, size and title.
+    :raises ValueError: If the platform or the selected format cannot be streamed.
+    """
+    formats = AUDIO_STREAM_FORMATS if kind == "audio" else STREAM_FORMATS
+    fmt = formats.get(platform)
+    if fmt is None:
+        raise ValueError(f"Streaming {kind} is not supported for {platform}")
+    protocols = TRANSCODE_PROTOCOLS if kind == "audio" else ("http", "https")
+
+    with yt_dlp.YoutubeDL(build_options(platform, fmt)) as ydl:
+        info = ydl.extract_info(url, download=False)
+    metadata_cache.put(platform, url, info)
+
+    # Formats that need merging (separate video and audio) cannot be proxied as one file
+    if info.get("requested_formats") or not info.get("url"):
+        raise ValueError("No single-file format is available for streaming")
+    if info.get("protocol") not in protocols:
+        raise ValueError(f"Format protocol {info.get('protocol')} cannot be streamed")
+
+    return {
+        "url": info["url"],
+        "http_headers": info.get("http_headers") or {},
+        "ext": info.get("ext") or "mp4",
+        "filesize": info.get("filesize"),
+        "title": sanitize_filename(info.get("title") or "Unknown Title"),
+    }
+
+
+async def get_stream(platform: str, url: str, kind: str = "video") -> dict:
+    """
+    Returns the resolved stream of a URL, reusing a recent resolution when possible.
+    Concurrent requests for the same media share one extraction.
+
+    :param platform: Platform name.
+    :param url: Media URL.
+    :param kind: "video" or "audio", see resolve_stream().
+    :return: Dictionary returned by resolve_stream().
+    """
+    key = f"{media_key(platform, url)}:{kind}"
+    with _lock:
+        entry = _resolved.get(key)
+        if entry and entry[0] > time.time():
+            return entry[1]
+        _resolved.pop(key, None)
+
+    stream = await single_flight(f"{key}:stream", lambda: run_blocking(platform, resolve_stream, platform, url, kind))
+    with _lock:
+        now = time.time()
+        for stale in [k for k, (expires_at, _) in _resolved.items() if expires_at <= now]:
+            del _resolved[stale]
+        _resolved[key] = (now + STREAM_URL_TTL_SECONDS, stream)
+    return stream
+
+
+def forget_stream(platform: str, url: str, kind: str = "video"):
+    """
+    Drops a resolved stream, e.g. after the platform rejected its direct URL.
+    """
+    with _lock:
+        _resolved.pop(f"{media_key(platform, url)}:{kind}", None)
+
+
+def _get_transcode_semaphore() -> asyncio.Semaphore:
+    global _transcode_semaphore
+    if _transcode_semaphore is None:
+        _transcode_semaphore = asyncio.Semaphore(TRANSCODE_MAX_CONCURRENCY)
+    return _transcode_semaphore
+
+
+async def transcode_to_mp3(stream: dict, bitrate: str):
+    """
+    Starts an ffmpeg process that reads the source URL and encodes it to MP3 on stdout.
+    The first chunk is read before returning so a failing source is reported as an error
+    instead of an empty response.
+
+    :param stream: Dictionary returned by get_stream(..., kind="audio").
+    :param bitrate: MP3 bitrate in kbps (one of AUDIO_BITRATES).
+    :return: Async iterator over the encoded MP3 bytes. Closing it stops ffmpeg.
+    :raises RuntimeError: If ffmpeg produced no output.
+    """
+    semaphore = _get_transcode_semaphore()
+    await semaphore.acquire()
+
+    headers = "".join(f"{name}: {value}\r\n" for name, value in stream["http_headers"].items())
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if headers:
+        command += ["-headers", headers]
+    command += ["-i", stream["url"], "-vn", "-c:a", "libmp3lame", "-b:a", f"{bitrate}k", "-f", "mp3", "pipe:1"]
+
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except Exception:
+        semaphore.release()
+        raise
+
+    released = False
+
+    async def stop():
+        nonlocal released
+        # The slot is freed before any await: a disconnect cancels this coroutine again
+        try:
+            if process.returncode is None:
+                process.kill()
+        finally:
+            if not released:
+                released = True
+                semaphore.release()
+        # Reap the killed process even if the caller is being cancelled
+        with anyio.CancelScope(shield=True):
+            await process.wait()
+
+    try:
+        first_chunk = await process.stdout.read(TRANSCODE_CHUNK_SIZE)
+    except BaseException:
+        await stop()
+        raise
+    if not first_chunk:
+        error = (await process.stderr.read()).decode(errors="replace").strip()
+        await stop()
+        raise RuntimeError(f"ffmpeg failed: {error or 'no output'}")
+
+    async def chunks():
+        try:
+            yield first_chunk
+            while True:
+                chunk = await process.stdout.read(TRANSCODE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            # Runs when the encode ends and when the client disconnects mid-stream
+            await stop()
+
+    return chunks()
@@ -0,0 +1,165 @@
+import os
+import glob
+import time
+import asyncio
+import threading
+from dotenv import load_dotenv
+from app.utils import download_cache
+
+# Load environment variables
+load_dotenv()
+DOWNLOAD_FOLDER = os.getenv("DOWNLOAD_FOLDER", "/tmp/downloads")
+# Seconds a downloaded file may stay in DOWNLOAD_FOLDER before the reaper deletes it
+DOWNLOAD_MAX_AGE_SECONDS = int(os.getenv("DOWNLOAD_MAX_AGE_SECONDS", "3600"))
+# Total bytes allowed in DOWNLOAD_FOLDER; the oldest files are deleted beyond it
+DOWNLOAD_FOLDER_MAX_BYTES = int(os.getenv("DOWNLOAD_FOLDER_MAX_BYTES", str(5 * 1024 ** 3)))
+# Seconds between two reaper runs
+REAPER_INTERVAL_SECONDS = int(os.getenv("REAPER_INTERVAL_SECONDS", "60"))
+
+# path -> {"size", "created_at", "filename"}
+_files = {}
+_lock = threading.Lock()
+_stats = {"expired": 0, "evicted": 0, "runs": 0}
+
+
+def track(path: str, created_at: float = None, filename: str = None):
+    """
+    Registers a finished file in the index so the reaper can expire it.
+
+    :param path: Path of a file in DOWNLOAD_FOLDER.
+    :param created_at: When the file was written (now by default). The modification time
+        is not used because yt-dlp copies it from the platform.
+    :param filename: Name offered to the client when the file is served (its base name by default).
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+    with _lock:
+        _files[os.path.abspath(path)] = {
+            "size": stat.st_size,
+            "created_at": created_at or time.time(),
+            "filename": filename,
+        }
+
+
+def display_name(path: str) -> str:
+    """
+    Returns the name a file should be downloaded as (e.g. the media title).
+    """
+    with _lock:
+        entry = _files.get(os.path.abspath(path))
+    return (entry and entry["filename"]) or os.path.basename(path)
+
+
+def forget(path: str):
+    """
+    Removes a file from the index after it was deleted elsewhere.
+    """
+    with _lock:
+        _files.pop(os.path.abspath(path), None)
+
+
+def scan_folder():
+    """
+    Indexes the files left in DOWNLOAD_FOLDER by a previous run, including the temporary
+    files of downloads killed with their worker, so they expire like any other file.
+    Called once at startup; afterwards the index is kept up to date by track() and forget().
+    """
+    os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+    with os.scandir(DOWNLOAD_FOLDER) as entries:
+        for entry in entries:
+            if entry.is_file():
+                # ctime is when the file was last written or renamed here
+                track(entry.path, entry.stat().st_ctime)
+
+
+def _remove(path: str) -> bool:
+    """
+    Deletes an indexed file. Files owned by the download cache go through it, so the
+    ones being served are kept.
+
+    :return: False if the file is in use and was kept.
+    """
+    if download_cache.is_cached(path):
+        if not download_cache.discard(path):
+            return False
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error deleting file {path}: {str(e)}")
+            return False
+    forget(path)
+    return True
+
+
+def remove_temp_files(temp_base: str):
+    """
+    Deletes the files a failed or cancelled download left under ``temp_base``: the
+    temporary file, yt-dlp's .part and .ytdl files and the parts of merged formats.
+    """
+    for path in glob.glob(f"{glob.escape(temp_base)}.*"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error deleting file {path}: {str(e)}")
+
+
+def sweep():
+    """
+    Deletes files older than DOWNLOAD_MAX_AGE_SECONDS, then the oldest files until
+    DOWNLOAD_FOLDER fits DOWNLOAD_FOLDER_MAX_BYTES.
+    """
+    now = time.time()
+    with _lock:
+        files = sorted(_files.items(), key=lambda item: item[1]["created_at"])
+
+    remaining = []
+    for path, entry in files:
+        if not os.path.exists(path):
+            forget(path)
+        elif now - entry["created_at"] > DOWNLOAD_MAX_AGE_SECONDS and _remove(path):
+            _stats["expired"] += 1
+        else:
+            remaining.append((path, entry))
+
+    total = sum(entry["size"] for _, entry in remaining)
+    for path, entry in remaining:
+        if total <= DOWNLOAD_FOLDER_MAX_BYTES:
+            break
+        if _remove(path):
+            total -= entry["size"]
+            _stats["evicted"] += 1
+    _stats["runs"] += 1
+
+
+async def run_reaper():
+    """
+    Background task that indexes DOWNLOAD_FOLDER and sweeps it every REAPER_INTERVAL_SECONDS.
+    """
+    await asyncio.to_thread(scan_folder)
+    while True:
+        try:
+            await asyncio.to_thread(sweep)
+        except Exception as e:
+            print(f"Error in download folder reaper: {str(e)}")
+        await asyncio.sleep(REAPER_INTERVAL_SECONDS)
+
+
+def disk_usage_stats() -> dict:
+    """
+    Returns the indexed usage of DOWNLOAD_FOLDER and the reaper counters.
+    """
+    with _lock:
+        return {
+            **_stats,
+            "files": len(_files),
+            "size_bytes": sum(entry["size"] for entry in _files.values()),
+            "max_bytes": DOWNLOAD_FOLDER_MAX_BYTES,
+            "max_age_seconds": DOWNLOAD_MAX_AGE_SECONDS,
+        }
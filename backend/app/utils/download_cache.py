@@ -0,0 +1,224 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Total bytes of downloaded media kept for reuse (0 disables the cache)
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# Seconds a cached download may be reused
+DOWNLOAD_CACHE_TTL_SECONDS = int(os.getenv("DOWNLOAD_CACHE_TTL_SECONDS", "3600"))
+
+# key -> {"path", "size", "created_at", "refs"}, least recently used first
+_entries = OrderedDict()
+# path -> key, to find entries from the file name the routes receive
+_paths = {}
+# key -> threading.Event for downloads in progress
+_pending = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "shared": 0, "evictions": 0}
+
+
+def make_key(platform: str, info: dict, fmt: str, quality: str = None) -> str:
+    """
+    Builds the cache key of a download from the extractor's canonical media ID.
+
+    :param platform: Platform name.
+    :param info: Info dict returned by yt-dlp.
+    :param fmt: yt-dlp format selector used for the download.
+    :param quality: Requested quality (e.g. audio bitrate), if any.
+    :return: Cache key.
+    """
+    return f"{platform}:{info.get('extractor_key')}:{info.get('id')}:{fmt}:{quality or ''}"
+
+
+def _is_fresh(entry: dict) -> bool:
+    return time.time() - entry["created_at"] < DOWNLOAD_CACHE_TTL_SECONDS and os.path.exists(entry["path"])
+
+
+def _drop(key: str):
+    """
+    Removes an entry from the index and deletes its file unless it is being served.
+    Must be called with the lock held.
+    """
+    entry = _entries.pop(key, None)
+    if not entry:
+        return
+    if _paths.get(entry["path"]) == key:
+        _paths.pop(entry["path"], None)
+        if entry["refs"] == 0 and os.path.exists(entry["path"]):
+            try:
+                os.remove(entry["path"])
+            except OSError as e:
+                print(f"Error deleting cached file {entry['path']}: {str(e)}")
+
+
+def _evict(keep: str = None):
+    """
+    Drops expired entries, then least recently used ones until the cache fits its budget.
+    Files that are currently being served are skipped. Must be called with the lock held.
+
+    :param keep: Key of an entry just added, whose file the caller is about to return.
+    """
+    for key in [key for key, entry in _entries.items() if not _is_fresh(entry) and entry["refs"] == 0 and key != keep]:
+        _drop(key)
+        _stats["evictions"] += 1
+
+    total = sum(entry["size"] for entry in _entries.values())
+    for key in list(_entries):
+        if total <= DOWNLOAD_CACHE_MAX_BYTES:
+            break
+        entry = _entries[key]
+        if entry["refs"] > 0 or key == keep:
+            continue
+        total -= entry["size"]
+        _drop(key)
+        _stats["evictions"] += 1
+
+
+def lookup(key: str) -> str:
+    """
+    Returns the cached file for a key without downloading anything.
+
+    :param key: Cache key from make_key().
+    :return: Path of the cached file, or None.
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry and _is_fresh(entry):
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return entry["path"]
+        return None
+
+
+def get_or_download(key: str, download) -> str:
+    """
+    Returns the cached file for a key, or runs ``download`` to produce it.
+    Concurrent callers with the same key wait for the first download and share its file.
+
+    :param key: Cache key from make_key().
+    :param download: Callable performing the download and returning the final file path.
+    :return: Path of the downloaded file.
+    """
+    if DOWNLOAD_CACHE_MAX_BYTES <= 0:
+        return download()
+
+    waited = False
+    while True:
+        with _lock:
+            entry = _entries.get(key)
+            # Entries being served are kept past their TTL until released
+            if entry and (_is_fresh(entry) or (entry["refs"] > 0 and os.path.exists(entry["path"]))):
+                _entries.move_to_end(key)
+                _stats["shared" if waited else "hits"] += 1
+                return entry["path"]
+            if entry:
+                _drop(key)
+            event = _pending.get(key)
+            if event is None:
+                event = _pending[key] = threading.Event()
+                _stats["misses"] += 1
+                break
+        # Someone else is downloading the same item
+        event.wait()
+        waited = True
+
+    try:
+        path = download()
+    except Exception:
+        with _lock:
+            _pending.pop(key, None)
+        event.set()
+        raise
+
+    with _lock:
+        absolute_path = os.path.abspath(path)
+        size = os.path.getsize(absolute_path)
+        _pending.pop(key, None)
+        # A file larger than the whole budget would evict everything else: it is not kept
+        if size <= DOWNLOAD_CACHE_MAX_BYTES:
+            # A different item that wrote to the same path replaced that file
+            previous = _paths.get(absolute_path)
+            if previous and previous != key:
+                _entries.pop(previous, None)
+            _entries[key] = {
+                "path": absolute_path,
+                "size": size,
+                "created_at": time.time(),
+                "refs": 0,
+            }
+            _paths[absolute_path] = key
+            # The new file is returned to the caller, so only older entries make room
+            _evict(keep=key)
+    event.set()
+    return path
+
+
+def is_cached(path: str) -> bool:
+    """
+    Returns True if the file is owned by the download cache.
+    """
+    with _lock:
+        return os.path.abspath(path) in _paths
+
+
+def discard(path: str) -> bool:
+    """
+    Drops a cached file and deletes it, unless it is being served.
+
+    :return: False if the file is in use and was kept.
+    """
+    with _lock:
+        key = _paths.get(os.path.abspath(path))
+        if key is not None:
+            if _entries[key]["refs"] > 0:
+                return False
+            _drop(key)
+            _stats["evictions"] += 1
+        elif os.path.exists(path):
+            os.remove(path)
+        return True
+
+
+def acquire(path: str) -> bool:
+    """
+    Protects a cached file from eviction while it is being served.
+
+    :return: False if the file is not in the cache.
+    """
+    with _lock:
+        key = _paths.get(os.path.abspath(path))
+        if key is None:
+            return False
+        _entries[key]["refs"] += 1
+        _entries.move_to_end(key)
+        return True
+
+
+def release(path: str):
+    """
+    Releases a reference taken with acquire().
+    """
+    with _lock:
+        key = _paths.get(os.path.abspath(path))
+        if key is not None:
+            _entries[key]["refs"] = max(0, _entries[key]["refs"] - 1)
+            _evict()
+
+
+def cache_stats() -> dict:
+    """
+    Returns cache usage and hit/miss counters.
+    """
+    with _lock:
+        return {
+            **_stats,
+            "entries": len(_entries),
+            "size_bytes": sum(entry["size"] for entry in _entries.values()),
+            "max_bytes": DOWNLOAD_CACHE_MAX_BYTES,
+            "ttl_seconds": DOWNLOAD_CACHE_TTL_SECONDS,
+            "in_progress": len(_pending),
+        }
@@ -0,0 +1,143 @@
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Total number of worker threads shared by every platform
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "16"))
+# Default number of simultaneous jobs per platform (override with e.g. YOUTUBE_MAX_CONCURRENCY)
+DEFAULT_PLATFORM_CONCURRENCY = int(os.getenv("PLATFORM_MAX_CONCURRENCY", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+_semaphores = {}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the shared executor, creating it on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="download")
+        return _executor
+
+
+def shutdown_executor():
+    """
+    Stops the shared executor. Running jobs are allowed to finish.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def get_platform_limit(platform: str) -> int:
+    """
+    Returns the maximum number of concurrent jobs allowed for a platform.
+
+    :param platform: Platform name (youtube, tiktok, ...).
+    :return: Concurrency cap.
+    """
+    value = os.getenv(f"{platform.upper()}_MAX_CONCURRENCY")
+    return max(1, int(value)) if value else DEFAULT_PLATFORM_CONCURRENCY
+
+
+def _get_semaphore(platform: str) -> asyncio.Semaphore:
+    if platform not in _semaphores:
+        _semaphores[platform] = asyncio.Semaphore(get_platform_limit(platform))
+    return _semaphores[platform]
+
+
+def _get_stats(platform: str) -> dict:
+    with _stats_lock:
+        if platform not in _stats:
+            _stats[platform] = {
+                "queued": 0,
+                "running": 0,
+                "completed": 0,
+                "failed": 0,
+                "total_wait_seconds": 0.0,
+                "max_wait_seconds": 0.0,
+            }
+        return _stats[platform]
+
+
+async def run_blocking(platform: str, func, *args, **kwargs):
+    """
+    Runs a blocking service function in the shared executor without blocking the event loop.
+    Jobs wait for a free per-platform slot before being handed to the pool.
+
+    :param platform: Platform name used for the concurrency cap and metrics.
+    :param func: Blocking callable (e.g. engine.download).
+    :return: Whatever the callable returns.
+    """
+    stats = _get_stats(platform)
+    submitted_at = time.monotonic()
+    state = {"started": False, "abandoned": False}
+    with _stats_lock:
+        stats["queued"] += 1
+
+    def call():
+        waited = time.monotonic() - submitted_at
+        with _stats_lock:
+            state["started"] = True
+            if not state["abandoned"]:
+                stats["queued"] -= 1
+            stats["running"] += 1
+            stats["total_wait_seconds"] += waited
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        try:
+            result = func(*args, **kwargs)
+            with _stats_lock:
+                stats["completed"] += 1
+            return result
+        except Exception:
+            with _stats_lock:
+                stats["failed"] += 1
+            raise
+        finally:
+            with _stats_lock:
+                stats["running"] -= 1
+
+    try:
+        async with _get_semaphore(platform):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_executor(), call)
+    finally:
+        with _stats_lock:
+            if not state["started"] and not state["abandoned"]:
+                # Cancelled before a worker picked the job up
+                state["abandoned"] = True
+                stats["queued"] -= 1
+
+
+def executor_stats() -> dict:
+    """
+    Returns queue depth, running jobs and wait-time metrics per platform.
+    """
+    with _stats_lock:
+        platforms = {}
+        for platform, stats in _stats.items():
+            started = stats["completed"] + stats["failed"] + stats["running"]
+            platforms[platform] = {
+                **stats,
+                "limit": get_platform_limit(platform),
+                "avg_wait_seconds": round(stats["total_wait_seconds"] / started, 3) if started else 0.0,
+            }
+        return {
+            "workers": DOWNLOAD_WORKERS,
+            "queued": sum(s["queued"] for s in _stats.values()),
+            "running": sum(s["running"] for s in _stats.values()),
+            "platforms": platforms,
+        }
@@ -0,0 +1,161 @@
+import os
+import asyncio
+import anyio
+from dotenv import load_dotenv
+from fastapi.responses import FileResponse
+from app.utils import download_cache, disk_quota
+
+# Load environment variables
+load_dotenv()
+# Seconds a fully downloaded file is kept for repeated or resumed requests before it is deleted
+FILE_GRACE_SECONDS = int(os.getenv("FILE_GRACE_SECONDS", "120"))
+# Bytes read from the file per chunk sent to the client
+FILE_CHUNK_SIZE = int(os.getenv("FILE_CHUNK_SIZE", str(1024 * 1024)))
+
+# path -> number of responses currently sending it
+_active = {}
+# path -> timer that deletes it once the grace window is over
+_pending_deletes = {}
+_stats = {"served": 0, "completed": 0, "interrupted": 0, "deleted": 0}
+
+
+class DownloadFileResponse(FileResponse):
+    """
+    FileResponse that reports whether the client received the whole file.
+
+    Range and If-Range are handled by FileResponse, so interrupted downloads can be resumed.
+    """
+    chunk_size = FILE_CHUNK_SIZE
+
+    def __init__(self, path: str, on_start=None, on_finish=None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.on_start = on_start
+        self.on_finish = on_finish
+
+    async def __call__(self, scope, receive, send):
+        transfer = {"status": None, "content_range": None, "done": False}
+        disconnected = False
+
+        async def tracking_send(message):
+            if message["type"] == "http.response.start":
+                transfer["status"] = message["status"]
+                transfer["content_range"] = dict(message["headers"]).get(b"content-range")
+            elif not message.get("more_body", False):
+                transfer["done"] = True
+            await send(message)
+
+        async def watch_disconnect(cancel_scope):
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    # Servers also report a disconnect once the response is complete
+                    if not transfer["done"]:
+                        disconnected = True
+                        cancel_scope.cancel()
+                    return
+
+        if self.on_start:
+            self.on_start()
+        complete = False
+        try:
+            async with anyio.create_task_group() as task_group:
+                task_group.start_soon(watch_disconnect, task_group.cancel_scope)
+                await super().__call__(scope, receive, tracking_send)
+                task_group.cancel_scope.cancel()
+            complete = (
+                not disconnected
+                and transfer["done"]
+                and scope["method"].upper() != "HEAD"
+                and _reaches_end(transfer["status"], transfer["content_range"])
+            )
+        finally:
+            if self.on_finish:
+                self.on_finish(complete)
+
+
+def _reaches_end(status: int, content_range: bytes) -> bool:
+    """
+    Returns True if a response carried the end of the file: a full 200 response, or a
+    206 whose range ends at the last byte (the last part of a resumed download).
+    """
+    if status == 200:
+        return True
+    if status != 206 or not content_range:
+        return False
+    # "bytes start-end/size"
+    span, _, size = content_range.decode("latin-1").partition("/")
+    return size.isdigit() and span.rsplit("-", 1)[-1] == str(int(size) - 1)
+
+
+def _delete(paths: list, delete):
+    for path in paths:
+        try:
+            delete(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error deleting file {path}: {str(e)}")
+        disk_quota.forget(path)
+    _stats["deleted"] += 1
+
+
+def serve_download(path: str, media_type: str, filename: str = None, delete=os.remove, companions: list = ()) -> DownloadFileResponse:
+    """
+    Serves a downloaded file with Range support. The file is deleted FILE_GRACE_SECONDS
+    after a complete transfer; interrupted transfers keep it so the client can resume,
+    and the reaper removes files that are never completed. Files owned by the download
+    cache are protected from eviction while they are sent and never deleted here.
+
+    :param path: Absolute path of an existing file.
+    :param media_type: Media type of the response.
+    :param filename: File name suggested to the client; by default the name registered
+        with disk_quota.track() (the media title), or the file's base name.
+    :param delete: Function used to delete the file and its companions.
+    :param companions: Files deleted together with the file (e.g. its thumbnail).
+    :return: Response sending the file.
+    """
+    cached = download_cache.acquire(path)
+
+    def on_start():
+        _active[path] = _active.get(path, 0) + 1
+        # A new request (e.g. a resumed download) keeps the file alive
+        timer = _pending_deletes.pop(path, None)
+        if timer:
+            timer.cancel()
+
+    def on_finish(complete: bool):
+        _active[path] -= 1
+        if not _active[path]:
+            del _active[path]
+        _stats["completed" if complete else "interrupted"] += 1
+        if cached:
+            download_cache.release(path)
+        if complete and path not in _active:
+            # Cached files stay for later requests; only their companions go
+            targets = list(companions) if cached else [path, *companions]
+            if targets:
+                _pending_deletes[path] = asyncio.get_running_loop().call_later(
+                    FILE_GRACE_SECONDS, delete_later, targets
+                )
+
+    def delete_later(targets: list):
+        _pending_deletes.pop(path, None)
+        asyncio.get_running_loop().run_in_executor(None, _delete, targets, delete)
+
+    _stats["served"] += 1
+    return DownloadFileResponse(
+        path,
+        on_start=on_start,
+        on_finish=on_finish,
+        media_type=media_type,
+        filename=filename or disk_quota.display_name(path),
+        stat_result=os.stat(path),
+    )
+
+
+def file_serving_stats() -> dict:
+    """
+    Returns transfer counters and the files waiting for their grace window to end.
+    """
+    return {**_stats, "active": len(_active), "pending_deletes": len(_pending_deletes)}
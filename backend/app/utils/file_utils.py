@@ -2,6 +2,8 @@ import os
 from fastapi import HTTPException
 from fastapi.responses import FileResponse
 import re
+from urllib.parse import quote
+from email.utils import parsedate_to_datetime
 
 def serve_file(file_path: str, base_folder: str, media_type: str = "video/mp4"):
     """
@@ -40,20 +42,36 @@ def sanitize_filename(filename: str) -> str:
     return re.sub(r'[<>:"/\\|?*]', "", filename).strip()
 
 
-def get_unique_filename(filepath: str) -> str:
+def content_disposition(filename: str) -> str:
     """
-    Generates a unique filename if a file with the same name already exists.
+    Builds a Content-Disposition header for a download, with an ASCII fallback name
+    and the original name encoded as RFC 5987 for non-ASCII titles.
 
-    :param filepath: Base file path.
-    :return: Unique file path.
+    :param filename: Name the client should save the file as.
+    :return: Header value.
     """
-    if not os.path.exists(filepath):
-        return filepath
+    fallback = filename.encode("ascii", "ignore").decode().replace('"', "") or "download"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
 
-    base, ext = os.path.splitext(filepath)
-    counter = 1
-    unique_filepath = f"{base} ({counter}){ext}"
-    while os.path.exists(unique_filepath):
-        counter += 1
-        unique_filepath = f"{base} ({counter}){ext}"
-    return unique_filepath
\ No newline at end of file
+
+def is_not_modified(request_headers, etag: str, last_modified: float = None) -> bool:
+    """
+    Checks the conditional headers of a GET request against the current version of a resource.
+
+    :param request_headers: Headers of the incoming request.
+    :param etag: Current ETag of the resource (quoted).
+    :param last_modified: Modification time of the resource (Unix timestamp), or None if unknown.
+    :return: True if the client's copy is still valid and a 304 can be sent.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
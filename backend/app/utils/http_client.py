@@ -0,0 +1,95 @@
+import os
+import asyncio
+import concurrent.futures
+import httpx
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Maximum open connections of the shared client, and how many are kept alive between requests
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+# Seconds to wait for a connection / between two reads
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+_client = None
+_loop = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        follow_redirects=True,
+        timeout=httpx.Timeout(HTTP_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=30,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the shared async HTTP client, creating it on first use.
+    Reusing one client keeps connections to media CDNs alive between requests.
+    """
+    global _client, _loop
+    if _client is None:
+        _client = _build_client()
+        _loop = asyncio.get_running_loop()
+    return _client
+
+
+async def close_http_client():
+    """
+    Closes the shared client and its pooled connections.
+    """
+    global _client, _loop
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        _loop = None
+
+
+async def fetch_to_file(url: str, save_path: str) -> str:
+    """
+    Downloads a small file (e.g. a thumbnail) with the shared client.
+
+    :param url: URL of the file.
+    :param save_path: Local path to write it to.
+    :return: The saved path.
+    """
+    response = await get_http_client().get(url)
+    response.raise_for_status()
+
+    def write():
+        with open(save_path, "wb") as file:
+            file.write(response.content)
+
+    await asyncio.to_thread(write)
+    return save_path
+
+
+def fetch_to_file_threadsafe(url: str, save_path: str) -> concurrent.futures.Future:
+    """
+    Starts fetch_to_file() from a worker thread and returns right away, so the
+    caller can keep working (e.g. downloading the media) while the file is fetched.
+    Without a running application loop the file is fetched synchronously.
+
+    :return: Future resolving to the saved path.
+    """
+    if _loop is not None and _loop.is_running():
+        return asyncio.run_coroutine_threadsafe(fetch_to_file(url, save_path), _loop)
+
+    future = concurrent.futures.Future()
+    try:
+        with httpx.Client(follow_redirects=True, timeout=HTTP_READ_TIMEOUT) as client:
+            response = client.get(url)
+            response.raise_for_status()
+        with open(save_path, "wb") as file:
+            file.write(response.content)
+        future.set_result(save_path)
+    except Exception as e:
+        future.set_exception(e)
+    return future
@@ -0,0 +1,176 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from dotenv import load_dotenv
+from app.utils.url_utils import media_key
+from app.utils import download_cache
+from app import database
+
+# Load environment variables
+load_dotenv()
+# Maximum number of metadata entries kept in memory
+METADATA_CACHE_MAX_ENTRIES = int(os.getenv("METADATA_CACHE_MAX_ENTRIES", "1024"))
+# Default seconds an entry stays valid (override per platform with e.g. METADATA_CACHE_TTL_TIKTOK)
+METADATA_CACHE_TTL_SECONDS = int(os.getenv("METADATA_CACHE_TTL_SECONDS", "3600"))
+# "memory" (per worker) or "mongo" (shared between workers through the existing database)
+METADATA_CACHE_BACKEND = os.getenv("METADATA_CACHE_BACKEND", "memory").lower()
+
+# Format fields worth keeping; stream URLs are left out because they expire
+FORMAT_FIELDS = ("format_id", "ext", "vcodec", "acodec", "width", "height", "fps", "abr", "tbr", "filesize", "protocol")
+
+# key -> (expires_at, metadata), least recently used first
+_entries = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "shared_hits": 0}
+_collection = None
+
+
+def get_ttl(platform: str) -> int:
+    """
+    Returns how long metadata of a platform stays valid, in seconds.
+    """
+    value = os.getenv(f"METADATA_CACHE_TTL_{platform.upper()}")
+    return int(value) if value else METADATA_CACHE_TTL_SECONDS
+
+
+def summarize(info: dict) -> dict:
+    """
+    Keeps the cacheable part of a yt-dlp info dict.
+
+    :param info: Info dict returned by extract_info().
+    :return: Title, thumbnail, duration, canonical ID and formats (without URLs).
+    """
+    metadata = {
+        field: info.get(field)
+        for field in ("id", "extractor_key", "webpage_url", "title", "thumbnail", "duration")
+        if info.get(field) is not None
+    }
+    metadata["formats"] = [
+        {field: fmt.get(field) for field in FORMAT_FIELDS if fmt.get(field) is not None}
+        for fmt in info.get("formats") or []
+    ]
+    return metadata
+
+
+def _get_collection():
+    """
+    Returns the Mongo collection used as shared backend, or None when disabled.
+    Uses the synchronous driver under the Motor client (sharing its connection pool)
+    because lookups run in worker threads.
+    """
+    global _collection
+    # Downloads go on with the per-worker cache while the database is missing or failing
+    if METADATA_CACHE_BACKEND != "mongo" or not database.is_available():
+        return None
+    if _collection is None:
+        collection = database.get_db().delegate["metadata_cache"]
+        collection.create_index("expires_at", expireAfterSeconds=0)
+        _collection = collection
+    return _collection
+
+
+def _remember(key: str, metadata: dict, expires_at: float):
+    with _lock:
+        _entries[key] = (expires_at, metadata)
+        _entries.move_to_end(key)
+        while len(_entries) > METADATA_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+
+
+def get(platform: str, url: str) -> dict:
+    """
+    Returns cached metadata for a URL, or None.
+
+    :param platform: Platform name.
+    :param url: Media URL.
+    :return: Metadata from summarize(), or None on a miss.
+    """
+    return get_by_key(media_key(platform, url))
+
+
+def get_by_key(key: str) -> dict:
+    """
+    Returns cached metadata for a media key from url_utils.media_key(), or None.
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[0] > time.time():
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[1]
+        if entry:
+            del _entries[key]
+
+    try:
+        collection = _get_collection()
+        if collection is not None:
+            doc = collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+            if doc:
+                _remember(key, doc["metadata"], doc["expires_at"].replace(tzinfo=timezone.utc).timestamp())
+                with _lock:
+                    _stats["shared_hits"] += 1
+                return doc["metadata"]
+    except Exception as e:
+        database.mark_unavailable(e)
+        print(f"Error reading metadata cache: {str(e)}")
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(platform: str, url: str, info: dict) -> dict:
+    """
+    Stores the metadata of an extracted URL.
+
+    :param platform: Platform name.
+    :param url: Media URL that was extracted.
+    :param info: Info dict returned by extract_info().
+    :return: The cached metadata.
+    """
+    key = media_key(platform, url)
+    metadata = summarize(info)
+    ttl = get_ttl(platform)
+    _remember(key, metadata, time.time() + ttl)
+
+    try:
+        collection = _get_collection()
+        if collection is not None:
+            collection.replace_one(
+                {"_id": key},
+                {"metadata": metadata, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)},
+                upsert=True,
+            )
+    except Exception as e:
+        database.mark_unavailable(e)
+        print(f"Error writing metadata cache: {str(e)}")
+    return metadata
+
+
+def find_cached_download(platform: str, url: str, fmt: str, quality: str = None):
+    """
+    Finds a finished download of a URL without contacting the platform, using cached
+    metadata to recover the canonical media ID.
+
+    :return: Tuple (file path, metadata), or (None, None) if the media must be downloaded.
+    """
+    metadata = get(platform, url)
+    if not metadata:
+        return None, None
+    path = download_cache.lookup(download_cache.make_key(platform, metadata, fmt, quality))
+    return (path, metadata) if path else (None, None)
+
+
+def metadata_cache_stats() -> dict:
+    """
+    Returns hit/miss counters and the number of cached entries.
+    """
+    with _lock:
+        return {
+            **_stats,
+            "entries": len(_entries),
+            "max_entries": METADATA_CACHE_MAX_ENTRIES,
+            "backend": METADATA_CACHE_BACKEND,
+        }
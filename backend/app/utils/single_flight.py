@@ -0,0 +1,41 @@
+import asyncio
+
+# key -> task shared by every concurrent caller
+_inflight = {}
+_stats = {"started": 0, "coalesced": 0}
+
+
+async def single_flight(key: str, work):
+    """
+    Runs ``work()`` once per key at a time. Callers arriving while it runs await
+    the same result (or exception) instead of starting their own.
+
+    :param key: Deduplication key (e.g. from url_utils.media_key()).
+    :param work: Callable returning an awaitable with the actual work.
+    :return: Result of the shared work.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(work())
+        _inflight[key] = task
+        _stats["started"] += 1
+
+        def forget(done):
+            if _inflight.get(key) is done:
+                del _inflight[key]
+            # Every caller may have gone away (e.g. a cancelled download): nobody else reads the error
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(forget)
+    else:
+        _stats["coalesced"] += 1
+    # A caller that goes away must not cancel the work other callers are waiting on
+    return await asyncio.shield(task)
+
+
+def single_flight_stats() -> dict:
+    """
+    Returns the number of shared and coalesced requests.
+    """
+    return {**_stats, "in_flight": len(_inflight)}
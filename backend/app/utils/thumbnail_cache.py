@@ -0,0 +1,204 @@
+import os
+import hashlib
+import asyncio
+import threading
+from typing import Optional
+from collections import OrderedDict
+from dotenv import load_dotenv
+from app.utils.http_client import get_http_client
+from app.utils.single_flight import single_flight
+
+# Load environment variables
+load_dotenv()
+# Folder where proxied thumbnails and their resized variants are kept
+THUMBNAIL_CACHE_FOLDER = os.getenv("THUMBNAIL_CACHE_FOLDER", "/tmp/thumbnails")
+# Total bytes of cached thumbnails; least recently used files are deleted beyond it
+THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv("THUMBNAIL_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+# Seconds browsers and CDNs may reuse a thumbnail without asking again
+THUMBNAIL_MAX_AGE_SECONDS = int(os.getenv("THUMBNAIL_MAX_AGE_SECONDS", "86400"))
+
+# Widths that can be requested, so clients cannot fill the cache with arbitrary sizes
+THUMBNAIL_WIDTHS = (160, 320, 480, 640, 1280)
+# format -> (Pillow format name, media type)
+THUMBNAIL_FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+
+# File signatures of the image types platforms return
+SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+# file name -> size, least recently used first
+_files = OrderedDict()
+_lock = threading.Lock()
+_loaded = False
+_stats = {"hits": 0, "misses": 0, "resized": 0, "evictions": 0}
+
+
+def _load_index():
+    """
+    Indexes the files left by a previous run, oldest access first.
+    Must be called with the lock held.
+    """
+    global _loaded
+    if _loaded:
+        return
+    os.makedirs(THUMBNAIL_CACHE_FOLDER, exist_ok=True)
+    entries = []
+    for name in os.listdir(THUMBNAIL_CACHE_FOLDER):
+        if name.endswith(".part"):
+            continue
+        stat = os.stat(os.path.join(THUMBNAIL_CACHE_FOLDER, name))
+        entries.append((stat.st_mtime, name, stat.st_size))
+    for _, name, size in sorted(entries):
+        _files[name] = size
+    _loaded = True
+
+
+def _touch(name: str) -> bool:
+    """
+    Marks a cached file as recently used.
+
+    :return: False if the file is not cached.
+    """
+    path = os.path.join(THUMBNAIL_CACHE_FOLDER, name)
+    with _lock:
+        _load_index()
+        if not os.path.exists(path):
+            _files.pop(name, None)
+            return False
+        if name not in _files:
+            # Written by another worker after the index was loaded
+            _files[name] = os.path.getsize(path)
+        _files.move_to_end(name)
+        return True
+
+
+def _store(name: str, data: bytes):
+    """
+    Writes a file into the cache, then evicts least recently used files over the budget.
+    Runs in a worker thread.
+    """
+    path = os.path.join(THUMBNAIL_CACHE_FOLDER, name)
+    temp_path = f"{path}.part"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+    with _lock:
+        _load_index()
+        _files[name] = len(data)
+        _files.move_to_end(name)
+        total = sum(_files.values())
+        while total > THUMBNAIL_CACHE_MAX_BYTES and len(_files) > 1:
+            old_name, size = _files.popitem(last=False)
+            total -= size
+            _stats["evictions"] += 1
+            try:
+                os.remove(os.path.join(THUMBNAIL_CACHE_FOLDER, old_name))
+            except OSError:
+                pass
+
+
+def _resize(source: str, width: int, fmt: str) -> bytes:
+    """
+    Downscales an image to the given width, keeping its aspect ratio.
+    Images narrower than the width are only re-encoded. Runs in a worker thread.
+    """
+    from io import BytesIO
+    from PIL import Image
+
+    with Image.open(source) as image:
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        if image.mode not in ("RGB", "RGBA") or (fmt == "jpeg" and image.mode == "RGBA"):
+            image = image.convert("RGB")
+        output = BytesIO()
+        image.save(output, THUMBNAIL_FORMATS[fmt][0], quality=80)
+        return output.getvalue()
+
+
+def media_type_of(path: str) -> str:
+    """
+    Returns the media type of a cached image from its first bytes.
+    """
+    with open(path, "rb") as file:
+        header = file.read(12)
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, media_type in SIGNATURES:
+        if header.startswith(signature):
+            return media_type
+    return "application/octet-stream"
+
+
+def _names(media_id: str, width: int = None, fmt: str = None) -> tuple:
+    """
+    Returns the cache file names of the original thumbnail and of the requested variant.
+    Keyed by media only: signed thumbnail URLs change every time the media is extracted.
+    """
+    original = hashlib.sha1(media_id.encode()).hexdigest()
+    return original, f"{original}_{width}.{fmt or 'webp'}" if width else original
+
+
+def find_thumbnail(media_id: str, width: int = None, fmt: str = None) -> Optional[str]:
+    """
+    Returns the path of a cached thumbnail without fetching anything, so thumbnails cached
+    by any worker are served without the media metadata. Runs in a worker thread.
+
+    :return: Path of the cached file, or None if it is not cached.
+    """
+    _, name = _names(media_id, width, fmt)
+    if not _touch(name):
+        return None
+    _stats["hits"] += 1
+    return os.path.join(THUMBNAIL_CACHE_FOLDER, name)
+
+
+async def get_thumbnail(media_id: str, source_url: str, width: int = None, fmt: str = None) -> str:
+    """
+    Returns the path of a cached thumbnail, fetching and resizing it on first use.
+    Concurrent requests for the same thumbnail share one fetch.
+
+    :param media_id: Media key the thumbnail belongs to.
+    :param source_url: Original thumbnail URL on the platform.
+    :param width: Optional width of a downscaled variant (one of THUMBNAIL_WIDTHS).
+    :param fmt: Format of the variant (one of THUMBNAIL_FORMATS), "webp" by default.
+    :return: Path of the cached file.
+    """
+    original, name = _names(media_id, width, fmt)
+
+    if _touch(name):
+        _stats["hits"] += 1
+        return os.path.join(THUMBNAIL_CACHE_FOLDER, name)
+
+    async def fetch():
+        if not _touch(original):
+            response = await get_http_client().get(source_url)
+            response.raise_for_status()
+            await asyncio.to_thread(_store, original, response.content)
+        if name != original:
+            data = await asyncio.to_thread(_resize, os.path.join(THUMBNAIL_CACHE_FOLDER, original), width, fmt or "webp")
+            await asyncio.to_thread(_store, name, data)
+            _stats["resized"] += 1
+        return os.path.join(THUMBNAIL_CACHE_FOLDER, name)
+
+    _stats["misses"] += 1
+    return await single_flight(f"thumbnail:{name}", fetch)
+
+
+def thumbnail_cache_stats() -> dict:
+    """
+    Returns thumbnail cache usage and hit/miss counters.
+    """
+    with _lock:
+        return {
+            **_stats,
+            "files": len(_files),
+            "size_bytes": sum(_files.values()),
+            "max_bytes": THUMBNAIL_CACHE_MAX_BYTES,
+        }
@@ -0,0 +1,85 @@
+import re
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = ("si", "feature", "igsh", "igshid", "ref", "ref_src", "ref_url", "s", "t", "is_from_webapp", "sender_device")
+
+# platform -> patterns whose first group is the media ID
+MEDIA_ID_PATTERNS = {
+    "youtube": [
+        r"youtu\.be/([\w-]{11})",
+        r"youtube\.com/(?:shorts|embed|live|v)/([\w-]{11})",
+        r"youtube\.com/.*[?&]v=([\w-]{11})",
+    ],
+    "tiktok": [r"tiktok\.com/.*/(?:video|photo)/(\d+)", r"tiktok\.com/v/(\d+)"],
+    "instagram": [r"instagram\.com/(?:[\w.]+/)?(?:p|reel|reels|tv)/([\w-]+)"],
+    "twitter": [r"(?:twitter|x)\.com/(?:[\w]+|i/web|i)/status(?:es)?/(\d+)"],
+    "facebook": [
+        r"facebook\.com/.*[?&]v=(\d+)",
+        r"facebook\.com/(?:[\w.]+/)?(?:videos|reel|watch/live)/(?:[\w.-]+/)?(\d+)",
+        r"fb\.watch/([\w-]+)",
+    ],
+}
+
+
+# platform -> hosts its links are served from
+PLATFORM_HOSTS = {
+    "youtube": ("youtube.com", "youtu.be"),
+    "tiktok": ("tiktok.com",),
+    "instagram": ("instagram.com",),
+    "twitter": ("twitter.com", "x.com"),
+    "facebook": ("facebook.com", "fb.watch"),
+    "soundcloud": ("soundcloud.com",),
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so trivially different links to the same page compare equal:
+    lowercases the host, drops "www."/"m." prefixes, fragments, trailing slashes and tracking parameters.
+
+    :param url: Original URL.
+    :return: Normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m.", "mobile."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ]
+    path = parts.path.rstrip("/")
+    return f"{host}{path}" + (f"?{urlencode(sorted(query))}" if query else "")
+
+
+def media_key(platform: str, url: str) -> str:
+    """
+    Derives a media identifier from a URL without contacting the platform.
+    Falls back to the normalized URL when the ID cannot be read from the link.
+
+    :param platform: Platform name (youtube, tiktok, ...).
+    :param url: Media URL.
+    :return: Identifier such as "youtube:dQw4w9WgXcQ".
+    """
+    for pattern in MEDIA_ID_PATTERNS.get(platform, []):
+        match = re.search(pattern, url, re.IGNORECASE)
+        if match:
+            return f"{platform}:{match.group(1)}"
+    return f"{platform}:{normalize_url(url)}"
+
+
+def detect_platform(url: str) -> str:
+    """
+    Guesses the platform of a link from its host.
+
+    :param url: Media URL.
+    :return: Platform name, or None for unknown hosts.
+    """
+    host = urlsplit(url.strip()).netloc.lower().split(":")[0]
+    for platform, hosts in PLATFORM_HOSTS.items():
+        if any(host == domain or host.endswith(f".{domain}") for domain in hosts):
+            return platform
+    return None
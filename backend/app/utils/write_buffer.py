@@ -0,0 +1,124 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+# Pending writes that trigger a flush right away
+WRITE_BUFFER_MAX_ITEMS = int(os.getenv("WRITE_BUFFER_MAX_ITEMS", "500"))
+# Seconds between two periodic flushes
+WRITE_BUFFER_FLUSH_SECONDS = float(os.getenv("WRITE_BUFFER_FLUSH_SECONDS", "1"))
+# Pending writes kept while the database is failing; older ones are dropped beyond it
+WRITE_BUFFER_MAX_PENDING = int(os.getenv("WRITE_BUFFER_MAX_PENDING", "10000"))
+
+_buffers = []
+
+
+class WriteBuffer:
+    """
+    Collects writes in memory and hands them to ``flush`` in batches, once
+    WRITE_BUFFER_MAX_ITEMS are pending or every WRITE_BUFFER_FLUSH_SECONDS, so requests
+    do not wait for the database. Writes to the same key are coalesced (the latest wins).
+    Failed batches are retried with the next flush.
+    """
+
+    def __init__(self, name: str, flush):
+        """
+        :param name: Name shown in the metrics.
+        :param flush: Coroutine function receiving a dict key -> value of pending writes.
+        """
+        self.name = name
+        self._flush = flush
+        self._pending = {}
+        self._in_flight = {}
+        self._lock = asyncio.Lock()
+        self._flush_task = None
+        self._stats = {"writes": 0, "flushes": 0, "flushed": 0, "errors": 0, "dropped": 0}
+        _buffers.append(self)
+
+    def add(self, key, value):
+        """
+        Queues a write. Must be called from the event loop.
+        """
+        self._pending.pop(key, None)
+        self._pending[key] = value
+        self._stats["writes"] += 1
+        if len(self._pending) >= WRITE_BUFFER_MAX_ITEMS and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    def get(self, key, default=None):
+        """
+        Returns a write not stored yet, so callers can read their own writes.
+        """
+        if key in self._pending:
+            return self._pending[key]
+        return self._in_flight.get(key, default)
+
+    def hold(self) -> asyncio.Lock:
+        """
+        Returns the lock held while a batch is written. Code rewriting what the flushes
+        write (e.g. a rebuild of derived data) holds it to run between two batches.
+        """
+        return self._lock
+
+    async def flush(self):
+        """
+        Writes every pending item.
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            self._in_flight, self._pending = self._pending, {}
+            try:
+                await self._flush(self._in_flight)
+            except Exception as e:
+                print(f"Error flushing {self.name} writes: {str(e)}")
+                self._stats["errors"] += 1
+                self._requeue()
+            except BaseException:
+                # Cancelled, e.g. on shutdown: the final flush writes the batch
+                self._requeue()
+                raise
+            else:
+                self._stats["flushes"] += 1
+                self._stats["flushed"] += len(self._in_flight)
+            finally:
+                self._in_flight = {}
+
+    def _requeue(self):
+        """
+        Puts the batch being written back in front of the pending writes, unless a newer
+        write replaced them meanwhile, so the next flush retries it.
+        """
+        self._pending = {**self._in_flight, **self._pending}
+        while len(self._pending) > WRITE_BUFFER_MAX_PENDING:
+            self._pending.pop(next(iter(self._pending)))
+            self._stats["dropped"] += 1
+
+    def stats(self) -> dict:
+        return {**self._stats, "pending": len(self._pending)}
+
+
+async def run_write_buffers():
+    """
+    Background task flushing every buffer each WRITE_BUFFER_FLUSH_SECONDS.
+    """
+    while True:
+        await asyncio.sleep(WRITE_BUFFER_FLUSH_SECONDS)
+        for buffer in _buffers:
+            await buffer.flush()
+
+
+async def flush_write_buffers():
+    """
+    Flushes every buffer, e.g. on shutdown.
+    """
+    for buffer in _buffers:
+        await buffer.flush()
+
+
+def write_buffer_stats() -> dict:
+    """
+    Returns the counters of every buffer.
+    """
+    return {buffer.name: buffer.stats() for buffer in _buffers}
@@ -0,0 +1,125 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from yt_dlp.utils import DownloadError
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.postprocessor import FFmpegFixupStretchedPP, FFmpegMergerPP, get_postprocessor
+
+
+def escape_outtmpl(path: str) -> str:
+    """
+    Escapes a literal path so yt-dlp does not treat "%" in titles as template fields.
+
+    :param path: Output path built from a media title.
+    :return: Path safe to use as (part of) an output template.
+    """
+    return path.replace("%", "%%")
+
+
+def download_from_info(ydl, info: dict, outtmpl: str) -> dict:
+    """
+    Downloads media from an info dict already returned by ``extract_info(download=False)``
+    on the same YoutubeDL instance, so the page is not extracted a second time.
+
+    :param ydl: YoutubeDL instance that produced ``info``.
+    :param info: Resolved info dict.
+    :param outtmpl: Output template for the downloaded file.
+    :return: Info dict of the completed download.
+    """
+    ydl.params["outtmpl"]["default"] = outtmpl
+    return ydl.process_ie_result(info, download=True)
+
+
+def add_postprocessors(ydl, postprocessors: list):
+    """
+    Adds postprocessors to an existing YoutubeDL instance, in the format of the
+    ``postprocessors`` option, e.g. once the selected format is known.
+
+    :param ydl: YoutubeDL instance.
+    :param postprocessors: Definitions with a "key" and the postprocessor arguments.
+    """
+    for definition in postprocessors:
+        definition = dict(definition)
+        when = definition.pop("when", "post_process")
+        # add_post_processor() attaches the downloader and its hooks
+        ydl.add_post_processor(get_postprocessor(definition.pop("key"))(None, **definition), when=when)
+
+
+def download_formats_parallel(ydl, info: dict, output_file: str) -> bool:
+    """
+    Downloads the formats of a merged selection (e.g. bestvideo+bestaudio) at the same
+    time instead of one after the other, then merges them into ``output_file``.
+    The progress hooks of the options receive the combined progress of all the formats;
+    the merge runs through yt-dlp's postprocessing, so postprocessor hooks, fixups and
+    post hooks run as with a regular download.
+
+    :param ydl: YoutubeDL instance that produced ``info``.
+    :param info: Resolved info dict.
+    :param output_file: Path of the merged file; its extension selects the container.
+    :return: False if ``info`` is not a multi-format selection or ffmpeg is missing,
+        in which case nothing was downloaded.
+    :raises DownloadError: If one of the formats could not be downloaded.
+    """
+    formats = info.get("requested_formats") or []
+    merger = FFmpegMergerPP(ydl)
+    if len(formats) < 2 or not merger.available:
+        return False
+
+    base, ext = os.path.splitext(output_file)
+    info = {**info, "filepath": output_file, "ext": ext[1:], "requested_formats": [dict(f) for f in formats]}
+    parts = []
+    for fmt in info["requested_formats"]:
+        fmt["filepath"] = f"{base}.f{fmt['format_id']}.{fmt['ext']}"
+        part_info = {**info, **fmt}
+        del part_info["requested_formats"]
+        parts.append(part_info)
+
+    progress_hook = _combined_progress_hook([part["filepath"] for part in parts], ydl.params.get("progress_hooks") or [])
+
+    def download_part(part: dict):
+        # A downloader of its own, reporting to the combined hook only
+        downloader = get_suitable_downloader(part, ydl.params)(ydl, ydl.params)
+        downloader.add_progress_hook(progress_hook)
+        return downloader.download(part["filepath"], part)
+
+    with ThreadPoolExecutor(max_workers=len(parts), thread_name_prefix="format") as pool:
+        results = list(pool.map(download_part, parts))
+    if not all(success for success, _ in results):
+        raise DownloadError("Failed to download every format")
+
+    # Same chain as YoutubeDL.process_info(): the merger deletes the parts once they are merged
+    info["__files_to_merge"] = [part["filepath"] for part in parts]
+    info["__postprocessors"] = [merger]
+    if info.get("stretched_ratio") not in (1, None) and ydl.params.get("fixup") not in ("ignore", "never", "warn"):
+        info["__postprocessors"].append(FFmpegFixupStretchedPP(ydl))
+    info = ydl.post_process(output_file, info)
+    for post_hook in ydl.params.get("post_hooks") or []:
+        post_hook(info["filepath"])
+    return True
+
+
+def _combined_progress_hook(filenames: list, hooks: list):
+    """
+    Builds a progress hook that adds up the progress of files downloaded in parallel and
+    reports it to ``hooks`` as a single download, "finished" once every file is done.
+    """
+    lock = threading.Lock()
+    progress = {filename: {} for filename in filenames}
+
+    def hook(d: dict):
+        with lock:
+            progress[d.get("filename")] = d
+            states = list(progress.values())
+        finished = all(state.get("status") == "finished" for state in states)
+        totals = [state.get("total_bytes") or state.get("total_bytes_estimate") for state in states]
+        combined = {
+            **d,
+            "status": "finished" if finished else "downloading",
+            "downloaded_bytes": sum(state.get("downloaded_bytes") or 0 for state in states),
+            "total_bytes": sum(totals) if all(totals) else None,
+            "speed": sum(state.get("speed") or 0 for state in states if state.get("status") == "downloading") or None,
+            "eta": max((state.get("eta") or 0 for state in states), default=None),
+        }
+        for progress_hook in hooks:
+            progress_hook(combined)
+    return hook
@@ -0,0 +1,2 @@
+# Makes "app" importable when pytest is started from the repository root,
+# where backend/pytest.ini is not read
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import app
+from app import database
+from app.services import rating_service
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_URI", "mongodb://test")
+    monkeypatch.setattr(database, "_client", mongomock_motor.AsyncMongoMockClient())
+    rating_service._average_cache.clear()
+    rating_service._pending_increments.clear()
+    return database.get_db()
+
+
+def test_unique_index_serves_the_rating_lookup(db):
+    asyncio.run(database.ensure_indexes())
+
+    indexes = asyncio.run(db["ratings"].index_information())
+    index = indexes["user_session_download_type"]
+    assert index["unique"]
+    # get_user_rating and _store_rating filter on exactly these fields
+    assert [field for field, _ in index["key"]] == ["user_session", "download_type"]
+    assert asyncio.run(db["cookies"].index_information())["session_id"]["unique"]
+
+    asyncio.run(db["ratings"].insert_one({"user_session": "a", "download_type": "tiktok", "rating": 3}))
+    with pytest.raises(DuplicateKeyError):
+        asyncio.run(db["ratings"].insert_one({"user_session": "a", "download_type": "tiktok", "rating": 4}))
+
+
+def test_case_variants_are_deduplicated_before_the_index(db):
+    asyncio.run(db["ratings"].insert_many([
+        {"user_session": "a", "download_type": "TikTok", "rating": 2},
+        {"user_session": "a", "download_type": "tiktok", "rating": 5},
+        {"user_session": "b", "download_type": "YouTube", "rating": 4},
+    ]))
+
+    assert asyncio.run(database.ensure_indexes()) == 1
+
+    ratings = asyncio.run(db["ratings"].find({}, {"_id": 0}).sort("user_session").to_list(None))
+    # The most recent variant is kept
+    assert ratings == [
+        {"user_session": "a", "download_type": "tiktok", "rating": 5},
+        {"user_session": "b", "download_type": "youtube", "rating": 4},
+    ]
+    assert "user_session_download_type" in asyncio.run(db["ratings"].index_information())
+    # Idempotent on the next start
+    assert asyncio.run(database.ensure_indexes()) == 0
+
+
+def test_prepare_database_recounts_aggregates_after_deduplication(db):
+    asyncio.run(db["ratings"].insert_many([
+        {"user_session": "a", "download_type": "TikTok", "rating": 2},
+        {"user_session": "a", "download_type": "tiktok", "rating": 5},
+    ]))
+    # Aggregates built before the duplicates were removed
+    asyncio.run(rating_service.rebuild_rating_aggregates())
+
+    asyncio.run(app._prepare_database())
+
+    assert asyncio.run(rating_service.get_average_rating("tiktok")) == {"average_rating": 5.0, "total_ratings": 1}
+
+
+def test_prepare_database_builds_aggregates_when_indexes_fail(db, monkeypatch):
+    async def failing_ensure_indexes():
+        raise RuntimeError("index build failed")
+
+    monkeypatch.setattr(app, "ensure_indexes", failing_ensure_indexes)
+    asyncio.run(db["ratings"].insert_one({"user_session": "a", "download_type": "tiktok", "rating": 4}))
+
+    asyncio.run(app._prepare_database())
+
+    assert asyncio.run(rating_service.get_average_rating()) == {"average_rating": 4.0, "total_ratings": 1}